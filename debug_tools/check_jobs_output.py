@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Check that --jobs N builds the same db.xml as a serial build, and that
+a build leaves the (process-wide shared) reference library unchanged
+"""
+
+import argparse
+import contextlib
+import difflib
+import io
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from lib.loader import ModuleLoader
+from lib.library import ReferenceLibrary
+from lib.db_items import ItemGenerator
+from lib.db_npcs import NPCGenerator
+from lib.db_battles import BattleGenerator
+from lib.db_stories import StoryGenerator
+from lib.db_images import ImageGenerator
+from lib.db_generator import DBGenerator
+
+
+def build_db_xml(module_dir, library, jobs):
+    """Run generation phases 4-9 like fg_generator.py and return db.xml text"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        loader = ModuleLoader(module_dir)
+        if not loader.load_all():
+            raise SystemExit(f"Failed to load module files from {module_dir}")
+
+        item_gen = ItemGenerator(loader, library, jobs=jobs)
+        loader.item_generator = item_gen
+        item_xml = item_gen.generate_items()
+        npc_xml = NPCGenerator(loader, library, jobs=jobs).generate()
+        battle_xml = BattleGenerator(loader, library).generate()
+        parcel_xml = item_gen.generate_parcels()
+        story_xml = StoryGenerator(loader, library).generate()
+        image_xml = ImageGenerator(loader, library).generate()
+
+        db_gen = DBGenerator(loader, library)
+        db_xml = db_gen.generate(
+            battle_xml=battle_xml,
+            story_xml=story_xml,
+            npc_xml=npc_xml,
+            item_xml=item_xml,
+            parcel_xml=parcel_xml,
+            image_xml=image_xml
+        )
+    return db_gen.to_xml_string(db_xml)
+
+
+def library_snapshot(library):
+    """Serialized NPC and item library data, for spotting in-place edits"""
+    return json.dumps([library.npcs.data, library.items.data], default=repr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('module_dir', help='Directory containing module YAML files')
+    parser.add_argument('--jobs', '-j', type=int, default=2, metavar='N',
+                        help='Worker processes for the parallel build (default: 2)')
+    args = parser.parse_args()
+
+    library = ReferenceLibrary()
+    library.load_all()
+    before = library_snapshot(library)
+
+    print(f"Building {args.module_dir} serially...")
+    serial = build_db_xml(args.module_dir, library, jobs=1)
+    if library_snapshot(library) != before:
+        print("[FAIL] the build modified reference library data")
+        return 1
+    print("[OK] reference library is unchanged")
+    print(f"Building {args.module_dir} with --jobs {args.jobs}...")
+    parallel = build_db_xml(args.module_dir, library, jobs=args.jobs)
+
+    if serial == parallel:
+        print("[OK] db.xml is identical")
+        return 0
+
+    print("[FAIL] db.xml differs between serial and parallel builds:")
+    diff = difflib.unified_diff(serial.splitlines(), parallel.splitlines(),
+                                'serial', f'jobs={args.jobs}', lineterm='', n=2)
+    for line in list(diff)[:40]:
+        print(f"  {line}")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
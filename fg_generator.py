@@ -36,6 +36,8 @@ def main():
     parser.add_argument('--update', metavar='MODFILE', help='Update existing .mod file with new content')
     parser.add_argument('--output', metavar='DIR', help='Output directory (default: ./output)')
     parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
+    parser.add_argument('--jobs', '-j', type=int, default=1, metavar='N',
+                        help='Worker processes for item, NPC and token generation (default: 1)')
     
     args = parser.parse_args()
     
@@ -60,6 +62,9 @@ def main():
     print("-" * 60)
     try:
         library = ReferenceLibrary()
+        # Generation needs every sub-library; load them here so failures
+        # report as load errors
+        library.load_all()
         stats = library.get_statistics()
         if args.verbose:
             print(f"  Loaded {stats['npcs_count']} NPCs/creatures")
@@ -109,7 +114,7 @@ def main():
     # Phase 4: Generate Items XML (MUST be first - NPCs and Parcels reference items)
     print("Phase 4: Generating Items XML")
     print("-" * 60)
-    item_gen = ItemGenerator(loader, library, verbose=args.verbose)
+    item_gen = ItemGenerator(loader, library, verbose=args.verbose, jobs=args.jobs)
     loader.item_generator = item_gen  # allow NPC generator to copy item attack tables onto npc.weapons
     item_xml = item_gen.generate_items()
     
@@ -122,7 +127,7 @@ def main():
     # Phase 5: Generate NPC XML (needs Items for weapon references)
     print("Phase 5: Generating NPC XML")
     print("-" * 60)
-    npc_gen = NPCGenerator(loader, library, verbose=args.verbose)
+    npc_gen = NPCGenerator(loader, library, verbose=args.verbose, jobs=args.jobs)
     npc_xml = npc_gen.generate()
     
     if npc_xml is not None:
@@ -207,7 +212,7 @@ def main():
     # Determine output settings
     output_dir = args.output if args.output else './output'
     
-    packager = ModulePackager(loader, verbose=args.verbose)
+    packager = ModulePackager(loader, verbose=args.verbose, jobs=args.jobs)
     
     try:
         output_path = packager.package(db_xml, output_dir=output_dir)
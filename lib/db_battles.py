@@ -2,7 +2,8 @@
 Battle XML Generator - Generate <battle> section from encounters
 """
 
-import xml.etree.ElementTree as ET
+from .xmltree import ET
+from xml.dom import minidom
 
 class BattleGenerator:
     def __init__(self, loader, library, verbose=False):
@@ -197,8 +198,6 @@ class BattleGenerator:
     
     def to_xml_string(self, root):
         """Convert element tree to formatted XML string"""
-        from xml.dom import minidom
-        
         rough_string = ET.tostring(root, encoding='unicode')
         reparsed = minidom.parseString(rough_string)
         return reparsed.toprettyxml(indent="\t")
@@ -2,7 +2,7 @@
 DB.xml Generator - Assemble complete db.xml from all sections
 """
 
-import xml.etree.ElementTree as ET
+from .xmltree import ET
 from xml.dom import minidom
 
 class DBGenerator:
@@ -2,7 +2,8 @@
 Images XML Generator - Generate <image> section from images.yaml
 """
 
-import xml.etree.ElementTree as ET
+from .xmltree import ET
+from xml.dom import minidom
 
 class ImageGenerator:
     def __init__(self, loader, library, verbose=False):
@@ -93,8 +94,6 @@ class ImageGenerator:
     
     def to_xml_string(self, root):
         """Convert element tree to formatted XML string"""
-        from xml.dom import minidom
-        
         rough_string = ET.tostring(root, encoding='unicode')
         reparsed = minidom.parseString(rough_string)
         return reparsed.toprettyxml(indent="\t")
@@ -5,11 +5,36 @@ When items are looted by players, FG automatically copies full data
 Includes MERP herb support from Rolemaster Companion 1
 """
 
-import xml.etree.ElementTree as ET
-from typing import Dict, Any
+from .xmltree import ET
+from xml.dom import minidom
+from typing import Dict, Any, Optional
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
 import copy
 
 
+# Generator inherited by forked worker processes (see ItemGenerator.jobs)
+_POOL_GENERATOR = None
+
+
+def _typed_subelement(parent, tag, type_name, text):
+    """Create <tag type="type_name">text</tag> under parent in one step"""
+    elem = ET.SubElement(parent, tag, {'type': type_name})
+    elem.text = text
+    return elem
+
+
+def _render_item_in_worker(yaml_item):
+    """Resolve and serialize one YAML item inside a worker process"""
+    gen = _POOL_GENERATOR
+    result = gen._resolve_yaml_item(yaml_item)
+    if result is None:
+        return None
+    # Placeholder tag - the parent process assigns the real ID
+    item_elem = gen._build_item_element(yaml_item, result['entry'], 'item')
+    return result['entry'], ET.tostring(item_elem)
+
+
 class ItemGenerator:
     """
     Generates Item XML with complete definitions
@@ -21,15 +46,17 @@ class ItemGenerator:
     - Treasure parcels can reference items
     """
     
-    def __init__(self, loader, library, verbose=False):
+    def __init__(self, loader, library, verbose=False, jobs=1):
         self.loader = loader
         self.library = library
         self.verbose = verbose
+        self.jobs = jobs  # Worker processes for item generation (1 = serial)
         self.item_next_id = 1
         self.parcel_next_id = 1
         self.parcel_item_entry_id = 1  # Separate counter for parcel item entries
         self.coin_types = ['MP', 'GP', 'SP', 'BP', 'CP', 'TP', 'IP']
         self.created_items = {}  # Store item data by name for parcel embedding
+        self._entry_xml_cache = {}  # item name -> template subtree for parcel embedding
     
     def get_next_item_id(self):
         """Get next item ID"""
@@ -116,18 +143,15 @@ class ItemGenerator:
         
         return item_elem
     
-    def create_item_from_yaml(self, yaml_item: Dict) -> ET.Element:
+    def _resolve_yaml_item(self, yaml_item: Dict) -> Optional[Dict]:
         """
-        Create item from YAML specification
-        
-        This creates COMPLETE item definitions in the module's item list
-        NPCs will reference these, players will get copies when looted
+        Resolve a YAML item specification against the library
         
         Args:
             yaml_item: Item specification from YAML
             
         Returns:
-            XML Element or None if not found
+            create_custom_item result (with 'entry') or None if not found
         """
         item_name = yaml_item.get('name')
         if not item_name:
@@ -153,76 +177,134 @@ class ItemGenerator:
             if self.verbose:
                 print(f"  Found '{item_name}' via library copy: {result['based_on']}")
             
-            # Store ID for cross-referencing
-            item_id = self.get_next_item_id()
-            self.loader.name_to_id['item'][item_name] = item_id
-            
-            # Store item data for parcel embedding (deep copy to avoid modification)
-            self.created_items[item_name] = copy.deepcopy(result['entry'])
-            
-            if self.verbose:
-                print(f"    DEBUG: Stored '{item_name}', entry has {len(result['entry'])} keys, has 'name': {'name' in result['entry']}")
-            
-            # Create XML from library data (pass the ID we just generated)
-            item_elem = self.create_item_from_library(result['entry'], item_id)
-            
-            # Override count if specified in YAML
-            if 'count' in yaml_item:
-                count_elem = item_elem.find('count')
-                if count_elem is not None:
-                    count_elem.text = str(yaml_item['count'])
-                else:
-                    count = ET.SubElement(item_elem, 'count')
-                    count.set('type', 'number')
-                    count.text = str(yaml_item['count'])
-            
-            return item_elem
+            return result
         
         # Case 2: Custom item based on template
-        else:
-            based_on = yaml_item['based_on']
-            modifications = yaml_item.get('modifications', {})
-            
-            result = self.library.create_custom_item(
-                item_name,
-                based_on,
-                modifications
-            )
-            
-            if not result['success']:
-                print(f"  WARNING: Could not create custom item '{item_name}'")
-                print(f"    {result['error']}")
-                if result.get('suggestions'):
-                    print(f"    Suggestions: {', '.join(result['suggestions'][:3])}")
-                return None
-            
-            if self.verbose:
-                print(f"  Created custom '{item_name}' based on {result['based_on']}")
-            
-            # Store ID for cross-referencing
-            item_id = self.get_next_item_id()
-            self.loader.name_to_id['item'][item_name] = item_id
-            
-            # Store item data for parcel embedding (deep copy to avoid modification)
-            self.created_items[item_name] = copy.deepcopy(result['entry'])
-            
-            if self.verbose:
-                print(f"    DEBUG: Stored custom '{item_name}', entry has {len(result['entry'])} keys, has 'name': {'name' in result['entry']}")
-            
-            # Create XML from custom data (pass the ID we just generated)
-            item_elem = self.create_item_from_library(result['entry'], item_id)
-            
-            # Override count if specified
-            if 'count' in yaml_item:
-                count_elem = item_elem.find('count')
-                if count_elem is not None:
-                    count_elem.text = str(yaml_item['count'])
-                else:
-                    count = ET.SubElement(item_elem, 'count')
-                    count.set('type', 'number')
-                    count.text = str(yaml_item['count'])
+        based_on = yaml_item['based_on']
+        modifications = yaml_item.get('modifications', {})
+        
+        result = self.library.create_custom_item(
+            item_name,
+            based_on,
+            modifications
+        )
+        
+        if not result['success']:
+            print(f"  WARNING: Could not create custom item '{item_name}'")
+            print(f"    {result['error']}")
+            if result.get('suggestions'):
+                print(f"    Suggestions: {', '.join(result['suggestions'][:3])}")
+            return None
+        
+        if self.verbose:
+            print(f"  Created custom '{item_name}' based on {result['based_on']}")
+        
+        return result
+    
+    def _register_item(self, yaml_item: Dict, entry: Dict) -> str:
+        """
+        Assign the next item ID and store the item for cross-referencing
+        
+        Returns:
+            The assigned item ID
+        """
+        item_name = yaml_item['name']
+        
+        # Store ID for cross-referencing
+        item_id = self.get_next_item_id()
+        self.loader.name_to_id['item'][item_name] = item_id
+        self.loader.recordnames['item'][item_name] = f'item.{item_id}'
+        
+        # Store item data for parcel embedding (deep copy to avoid modification)
+        self.created_items[item_name] = copy.deepcopy(entry)
+        
+        if self.verbose:
+            kind = "custom " if 'based_on' in yaml_item else ""
+            print(f"    DEBUG: Stored {kind}'{item_name}', entry has {len(entry)} keys, has 'name': {'name' in entry}")
+        
+        return item_id
+    
+    def _build_item_element(self, yaml_item: Dict, entry: Dict, item_id: str) -> ET.Element:
+        """Create the item XML from library data and apply the YAML count override"""
+        item_elem = self.create_item_from_library(entry, item_id)
+        
+        # Override count if specified in YAML
+        if 'count' in yaml_item:
+            count_elem = item_elem.find('count')
+            if count_elem is not None:
+                count_elem.text = str(yaml_item['count'])
+            else:
+                count = ET.SubElement(item_elem, 'count')
+                count.set('type', 'number')
+                count.text = str(yaml_item['count'])
+        
+        return item_elem
+    
+    def create_item_from_yaml(self, yaml_item: Dict) -> ET.Element:
+        """
+        Create item from YAML specification
+        
+        This creates COMPLETE item definitions in the module's item list
+        NPCs will reference these, players will get copies when looted
+        
+        Args:
+            yaml_item: Item specification from YAML
             
-            return item_elem
+        Returns:
+            XML Element or None if not found
+        """
+        result = self._resolve_yaml_item(yaml_item)
+        if result is None:
+            return None
+        
+        # Pass the ID we just generated to the XML builder
+        item_id = self._register_item(yaml_item, result['entry'])
+        return self._build_item_element(yaml_item, result['entry'], item_id)
+    
+    def _generate_items_parallel(self):
+        """
+        Build item XML in worker processes, then assign IDs in YAML order
+        
+        Workers are forked so they inherit self.library without pickling it.
+        Each worker returns (entry, serialized XML); IDs are assigned here so
+        they match the serial pass exactly (failed lookups don't consume IDs).
+        """
+        global _POOL_GENERATOR
+        
+        _POOL_GENERATOR = self
+        try:
+            ctx = multiprocessing.get_context('fork')
+            with ProcessPoolExecutor(max_workers=self.jobs, mp_context=ctx) as pool:
+                rendered = list(pool.map(_render_item_in_worker, self.loader.items))
+        finally:
+            _POOL_GENERATOR = None
+        
+        for yaml_item, built in zip(self.loader.items, rendered):
+            if built is None:
+                continue
+            entry, item_xml = built
+            item_id = self._register_item(yaml_item, entry)
+            item_elem = ET.fromstring(item_xml)
+            item_elem.tag = item_id
+            yield item_elem
+    
+    def _embed_item_data(self, item_name: str, parent: ET.Element):
+        """
+        Write a created item's full data into parent
+        
+        The same item is often embedded in many parcels, so the item dict is
+        converted once into a template subtree and deep-copied for each use.
+        """
+        template = self._entry_xml_cache.get(item_name)
+        if template is None:
+            template = ET.Element('item')
+            self.dict_to_xml(self.created_items[item_name], template)
+            self._entry_xml_cache[item_name] = template
+        
+        clone = copy.deepcopy(template)
+        
+        parent.attrib.update(clone.attrib)
+        parent.extend(list(clone))
     
     def create_treasure_parcel(self, parcel):
         """
@@ -292,6 +374,7 @@ class ItemGenerator:
                 item_entry = ET.SubElement(items, item_entry_id)
                 
                 item_name = item.get('name')
+                count_text = str(item.get('count', 1))
                 
                 # Embed full item data from created items
                 if item_name and item_name in self.created_items:
@@ -300,28 +383,21 @@ class ItemGenerator:
                         print(f"    DEBUG: Embedding '{item_name}', data has {len(self.created_items[item_name])} keys: {item_keys}")
                     
                     # Copy the complete item data into the parcel entry
-                    self.dict_to_xml(self.created_items[item_name], item_entry)
+                    self._embed_item_data(item_name, item_entry)
                     
                     # Override count from parcel specification
                     count_elem = item_entry.find('count')
                     if count_elem is not None:
-                        count_elem.text = str(item.get('count', 1))
+                        count_elem.text = count_text
                     else:
-                        count = ET.SubElement(item_entry, 'count')
-                        count.set('type', 'number')
-                        count.text = str(item.get('count', 1))
+                        _typed_subelement(item_entry, 'count', 'number', count_text)
                 else:
                     # Item not created - shouldn't happen if validation worked
                     if self.verbose:
                         print(f"    Warning: Item '{item_name}' in parcel but not generated")
                     
-                    name_elem = ET.SubElement(item_entry, 'name')
-                    name_elem.set('type', 'string')
-                    name_elem.text = item_name
-                    
-                    count = ET.SubElement(item_entry, 'count')
-                    count.set('type', 'number')
-                    count.text = str(item.get('count', 1))
+                    _typed_subelement(item_entry, 'name', 'string', item_name)
+                    _typed_subelement(item_entry, 'count', 'number', count_text)
         
         return parcel_elem
     
@@ -338,9 +414,19 @@ class ItemGenerator:
         # Create root item element
         item_root = ET.Element('item')
         
+        use_pool = (
+            self.jobs > 1 and len(self.loader.items) > 1
+            and 'fork' in multiprocessing.get_all_start_methods()
+        )
+        if use_pool:
+            if self.verbose:
+                print(f"  Using {self.jobs} worker processes")
+            item_elems = self._generate_items_parallel()
+        else:
+            item_elems = (self.create_item_from_yaml(yaml_item) for yaml_item in self.loader.items)
+        
         generated_count = 0
-        for yaml_item in self.loader.items:
-            item_elem = self.create_item_from_yaml(yaml_item)
+        for item_elem in item_elems:
             if item_elem is not None:
                 item_root.append(item_elem)
                 generated_count += 1
@@ -384,8 +470,6 @@ class ItemGenerator:
     
     def to_xml_string(self, root):
         """Convert element tree to formatted XML string"""
-        from xml.dom import minidom
-        
         rough_string = ET.tostring(root, encoding='unicode')
         reparsed = minidom.parseString(rough_string)
         return reparsed.toprettyxml(indent="\t")
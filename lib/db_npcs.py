@@ -4,9 +4,96 @@ Uses references to module items (single point of truth)
 When players loot, FG automatically copies full item data to character
 """
 
-import xml.etree.ElementTree as ET
+import copy
+import functools
+import multiprocessing
+import os
+import types
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from .xmltree import ET
 from typing import Dict, Any, Optional
 
+import yaml
+
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+
+# Generator inherited by forked worker processes (see NPCGenerator.jobs)
+_POOL_GENERATOR = None
+
+
+def _render_npc_in_worker(task):
+    """Build and serialize one NPC inside a worker process"""
+    yaml_npc, npc_id = task
+    gen = _POOL_GENERATOR
+    npc_elem = gen.create_npc_from_yaml(yaml_npc, ET.Element('npc'), npc_id=npc_id)
+    if npc_elem is None:
+        return None
+    # The letter token recorded on the worker's loader copy, for the parent
+    token_path = f"tokens/{npc_id}.png"
+    initial = getattr(gen.loader, 'generated_tokens', {}).get(token_path)
+    return ET.tostring(npc_elem), initial
+
+
+# Placeholder weapon names in library stat blocks ("Weapon" is also melee)
+_MELEE_NAMES = frozenset({'melee', 'weapon'})
+
+# Default weapon slot target meaning "append a new weapon entry"
+_NEW_SLOT = object()
+
+
+def _wname_raw(weapon_data):
+    """Weapon name from a library weapon entry ({'_text': ...} or plain value)"""
+    name = weapon_data.get('name')
+    return name.get('_text') if isinstance(name, dict) else name
+
+
+def _weapon_count_text(weapon_data):
+    """Count text of a library weapon entry (count is {'_text': ...} or a plain value)"""
+    count_val = weapon_data['count']
+    if isinstance(count_val, dict):
+        return str(count_val.get('_text', '1'))
+    return str(count_val)
+
+
+def _wname(weapon_data):
+    """Lowercased weapon name for placeholder matching ('' if missing)"""
+    name = weapon_data.get('name')
+    return (name.get('_text', '') if isinstance(name, dict) else name or '').lower()
+
+
+def _no_log(fmt, *args):
+    """Stand-in for NPCGenerator._log when not verbose"""
+
+
+def _clone_entry(value):
+    """
+    Deep-copy a library entry (nested dicts/lists of scalars)
+    
+    Library entries are plain YAML/JSON data, so this skips copy.deepcopy's
+    memo and type dispatch while still keeping the library's nested dicts
+    out of reach of per-NPC edits.
+    """
+    if isinstance(value, dict):
+        return {k: _clone_entry(v) if isinstance(v, (dict, list)) else v
+                for k, v in value.items()}
+    return [_clone_entry(v) if isinstance(v, (dict, list)) else v for v in value]
+
+
+@functools.lru_cache(maxsize=None)
+def _load_default_weapons(path: str, mtime: float):
+    """
+    Parse default_weapons.yaml once per (path, mtime)
+    
+    Returns a read-only mapping shared by every NPCGenerator instance
+    """
+    with open(path, 'r') as f:
+        return types.MappingProxyType(yaml.load(f, Loader=_YamlLoader) or {})
+
 
 class NPCGenerator:
     """
@@ -18,24 +105,63 @@ class NPCGenerator:
     - FG copies item data when looted by players
     """
     
-    def __init__(self, loader, library, verbose=False):
+    def __init__(self, loader, library, verbose=False, jobs=1):
         self.loader = loader
         self.library = library
         self.verbose = verbose
+        self.jobs = jobs  # Worker processes for NPC generation (1 = serial)
         self.next_id = 1
         
-        # Load default weapons mapping
-        import yaml
-        import os
+        # Debug logging: formatting is deferred to _print_log, and skipped
+        # entirely when not verbose
+        self._log = self._print_log if verbose else _no_log
+        
+        # Generated item dicts (loader.item_generator.created_items), bound on first use
+        self._created_items = None
+        
+        # NPC display name -> file-based tokens, filled on first lookup
+        self._token_index: Dict[str, Dict] = {}
+        
+        # Library lookup results, memoized per generator run
+        self._find_item_cache: Dict[str, Dict] = {}
+        self._find_npc_cache: Dict[tuple, Dict] = {}
+        
+        # Load default weapons mapping (cached across instances until the file changes)
         weapons_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'default_weapons.yaml')
         try:
-            with open(weapons_path, 'r') as f:
-                self.default_weapons = yaml.safe_load(f) or {}
+            mtime = os.path.getmtime(weapons_path)
+            self.default_weapons = _load_default_weapons(weapons_path, mtime)
         except FileNotFoundError:
             self.default_weapons = {}
             if self.verbose:
                 print("  Warning: default_weapons.yaml not found, skipping weapon assignment")
+        
+        # Precompute each NPC type's default weapon plan:
+        # base_type -> ((slot, name, ob_modifier, name_field), ...), slots assigned
+        # name_field is the weapon's ready-made {'@type', '_text'} name entry,
+        # shared by every NPC assigned that weapon (treat as read-only)
+        self._weapon_plan_cache: Dict[str, tuple] = {}
+        for base_type, default_config in self.default_weapons.items():
+            if not isinstance(default_config, dict) or 'weapons' not in default_config:
+                continue
+            plan = tuple(
+                (default_weapon.get('slot', 'melee'), default_weapon['name'], default_weapon.get('ob_modifier', 0),
+                 {'@type': 'string', '_text': default_weapon['name']})
+                for default_weapon in default_config['weapons']
+            )
+            self._weapon_plan_cache[base_type] = (plan, frozenset(entry[0] for entry in plan))
  
+    def _print_log(self, fmt: str, *args):
+        """Print a %-style debug message (bound as self._log when verbose)"""
+        print(fmt % args if args else fmt)
+    
+    def _resolve_created_items(self) -> Dict:
+        """Bind the item generator's created_items dict (empty if no item generator)"""
+        item_gen = getattr(self.loader, "item_generator", None)
+        created_items = getattr(item_gen, "created_items", None)
+        self._created_items = created_items if created_items is not None else {}
+        return self._created_items
+    
     def _add_attacktable_from_item(self, weapon_elem: ET.Element, weapon_name: str) -> bool:
         """Copy attacktable onto npc.weapons.* from the generated item dict (loader.item_generator.created_items)."""
 
@@ -52,11 +178,13 @@ class NPCGenerator:
                 return v.get("_text", "")
             return "" if v is None else str(v)
 
-        item_gen = getattr(self.loader, "item_generator", None)
-        if not item_gen or not hasattr(item_gen, "created_items"):
+        created_items = self._created_items
+        if created_items is None:
+            created_items = self._resolve_created_items()
+        if not created_items:
             return False
 
-        item_dict = item_gen.created_items.get(weapon_name)
+        item_dict = created_items.get(weapon_name)
         if not isinstance(item_dict, dict):
             return False
 
@@ -113,6 +241,21 @@ class NPCGenerator:
         initial = name[:1].upper() if name else "?"
         self.loader.generated_tokens[token_path] = initial
     
+    def _find_item_cached(self, name: str) -> Dict:
+        """library.find_item, memoized by name (weapon names repeat across NPCs)"""
+        result = self._find_item_cache.get(name)
+        if result is None:
+            result = self._find_item_cache[name] = self.library.find_item(name)
+        return result
+    
+    def _find_npc_cached(self, name: str, level: Optional[int] = None) -> Dict:
+        """library.find_npc, memoized by (name, level)"""
+        key = (name, level)
+        result = self._find_npc_cache.get(key)
+        if result is None:
+            result = self._find_npc_cache[key] = self.library.find_npc(name, level)
+        return result
+    
     def get_next_id(self):
         """Get next NPC ID"""
         npc_id = f"id-{self.next_id:05d}"
@@ -122,55 +265,66 @@ class NPCGenerator:
     def dict_to_xml(self, data: Dict[str, Any], parent: ET.Element, 
                     skip_items: bool = False):
         """
-        Recursively convert dictionary to XML
+        Convert dictionary to XML
+        
+        Walks nested dicts with an explicit work-list instead of recursion
+        (no per-level call overhead, no recursion limit on deep entries).
+        Each element's children are still created in dict order.
+        
+        Children are always created with SubElement under their final parent
+        (never built detached and appended), which keeps lxml tree building
+        linear for large <npc> sections.
         
         Args:
             data: Dictionary to convert
             parent: Parent XML element
             skip_items: If True, skip weapon/item sections (handled separately)
         """
-        for key, value in data.items():
-            if key.startswith('_'):
-                # Skip metadata fields
-                continue
-            
-            # Skip weapon/item sections if we're handling them separately
-            if skip_items and key in ['weapons', 'defences', 'items']:
-                continue
-            
-            if key.startswith('@'):
-                # This is an attribute
-                attr_name = key[1:]
-                parent.set(attr_name, str(value))
-            
-            elif isinstance(value, dict):
-                if '_text' in value:
-                    # Simple element with attributes and text
-                    elem = ET.SubElement(parent, key)
-                    elem.text = str(value['_text'])
-                    # Add any attributes
-                    for k, v in value.items():
-                        if k.startswith('@'):
-                            attr_name = k[1:]
-                            elem.set(attr_name, str(v))
-                else:
-                    # Complex nested structure
-                    elem = ET.SubElement(parent, key)
-                    self.dict_to_xml(value, elem, skip_items)
-            
-            elif isinstance(value, list):
-                # Multiple items with same tag
-                for item in value:
-                    elem = ET.SubElement(parent, key)
-                    if isinstance(item, dict):
-                        self.dict_to_xml(item, elem, skip_items)
+        SubElement = ET.SubElement
+        skipped_sections = ('weapons', 'defences', 'items') if skip_items else ()
+        pending = deque([(data, parent)])
+        
+        while pending:
+            data, parent = pending.pop()
+            for key, value in data.items():
+                if key.startswith('_'):
+                    # Skip metadata fields
+                    continue
+                
+                # Skip weapon/item sections if we're handling them separately
+                if key in skipped_sections:
+                    continue
+                
+                if key.startswith('@'):
+                    # This is an attribute
+                    parent.set(key[1:], str(value))
+                
+                elif isinstance(value, dict):
+                    elem = SubElement(parent, key)
+                    if '_text' in value:
+                        # Simple element with attributes and text
+                        elem.text = str(value['_text'])
+                        # Add any attributes
+                        for k, v in value.items():
+                            if k.startswith('@'):
+                                elem.set(k[1:], str(v))
                     else:
-                        elem.text = str(item)
-            
-            else:
-                # Simple value
-                elem = ET.SubElement(parent, key)
-                elem.text = str(value)
+                        # Complex nested structure
+                        pending.append((value, elem))
+                
+                elif isinstance(value, list):
+                    # Multiple items with same tag
+                    for item in value:
+                        elem = SubElement(parent, key)
+                        if isinstance(item, dict):
+                            pending.append((item, elem))
+                        else:
+                            elem.text = str(item)
+                
+                else:
+                    # Simple value
+                    elem = SubElement(parent, key)
+                    elem.text = str(value)
     
     def create_item_reference(self, item_name: str, parent: ET.Element, 
                             tag: str = "link") -> Optional[ET.Element]:
@@ -191,8 +345,6 @@ class NPCGenerator:
                 print(f"    Warning: Item '{item_name}' not in module item list")
             return None
         
-        item_id = self.loader.name_to_id['item'][item_name]
-        
         # Create link element
         link = ET.SubElement(parent, tag)
         link.set('type', 'windowreference')
@@ -201,7 +353,11 @@ class NPCGenerator:
         link_class.text = 'item'
         
         recordname = ET.SubElement(link, 'recordname')
-        recordname.text = f'item.{item_id}'
+        item_recordname = self.loader.recordnames['item'].get(item_name)
+        if item_recordname is None:
+            # Listed in items.yaml but never generated (ID is still a placeholder)
+            item_recordname = f"item.{self.loader.name_to_id['item'][item_name]}"
+        recordname.text = item_recordname
         
         return link
     
@@ -215,7 +371,13 @@ class NPCGenerator:
         if 'weapons' not in npc_data:
             return
         
-        weapons_section = ET.SubElement(npc_elem, 'weapons')
+        # Hoisted lookups for the per-weapon loop
+        item_name_to_id = self.loader.name_to_id.get('item', {})
+        verbose = self.verbose
+        log = self._log
+        SubElement = ET.SubElement
+        
+        weapons_section = SubElement(npc_elem, 'weapons')
         weapons = npc_data['weapons']       
  
         if not isinstance(weapons, dict):
@@ -225,15 +387,10 @@ class NPCGenerator:
             if weapon_id.startswith('_'):
                 continue
             
-            weapon_elem = ET.SubElement(weapons_section, weapon_id)
+            weapon_elem = SubElement(weapons_section, weapon_id)
             
             if isinstance(weapon_data, dict):
-                weapon_name = None
-                if 'name' in weapon_data:
-                    if isinstance(weapon_data['name'], dict):
-                        weapon_name = weapon_data['name'].get('_text')
-                    else:
-                        weapon_name = weapon_data['name']
+                weapon_name = _wname_raw(weapon_data)
                 
                 # Skip empty weapon slots (no name or empty name)
                 if not weapon_name or (isinstance(weapon_name, str) and not weapon_name.strip()):
@@ -241,20 +398,20 @@ class NPCGenerator:
                     weapons_section.remove(weapon_elem)
                     continue
                 
-                if self.verbose and weapon_name:
+                if verbose and weapon_name:
                     ob_val = weapon_data.get('ob', {})
                     if isinstance(ob_val, dict):
                         ob_val = ob_val.get('_text', 'N/A')
-                    print(f"    DEBUG: Processing weapon {weapon_id}: {weapon_name}, OB in data: {ob_val}")
+                    log("    DEBUG: Processing weapon %s: %s, OB in data: %s", weapon_id, weapon_name, ob_val)
                 
                 # Try to create reference
-                if weapon_name and weapon_name in self.loader.name_to_id.get('item', {}):
+                if weapon_name and weapon_name in item_name_to_id:
                     # Create reference to module item
-                    self.create_item_reference(weapon_name, weapon_elem, 'link')
+                    self.create_item_reference(weapon_name, weapon_elem)
                     
                     # FG weapons need name and OB alongside the link
                     if 'name' in weapon_data:
-                        name_elem = ET.SubElement(weapon_elem, 'name')
+                        name_elem = SubElement(weapon_elem, 'name')
                         name_elem.set('type', 'string')
                         if isinstance(weapon_data['name'], dict):
                             name_elem.text = weapon_data['name'].get('_text', weapon_name)
@@ -263,7 +420,7 @@ class NPCGenerator:
                     
                     if 'ob' in weapon_data:
                         try:
-                            ob_elem = ET.SubElement(weapon_elem, 'ob')
+                            ob_elem = SubElement(weapon_elem, 'ob')
                             ob_elem.set('type', 'number')
                             ob_val = weapon_data['ob']
                             if isinstance(ob_val, dict):
@@ -271,36 +428,32 @@ class NPCGenerator:
                             else:
                                 ob_text = str(ob_val)
                             ob_elem.text = ob_text
-                            if self.verbose:
-                                print(f"      DEBUG: Wrote OB {ob_text} for {weapon_name}")
+                            log("      DEBUG: Wrote OB %s for %s", ob_text, weapon_name)
                         except Exception as e:
-                            if self.verbose:
-                                print(f"      ERROR writing OB for {weapon_name}: {e}")
+                            log("      ERROR writing OB for %s: %s", weapon_name, e)
                     
 
 
                                         # If this weapon references a module item but has no attacktable in NPC data,
                     # copy the item's attack table onto the NPC weapon entry (FG expects this materialized).
                     if weapon_name and 'attacktable' not in weapon_data:
-                        if self.verbose:
-                            print(f"      DEBUG: Attempting attacktable copy for {weapon_name} (no attacktable in NPC data)")
+                        log("      DEBUG: Attempting attacktable copy for %s (no attacktable in NPC data)", weapon_name)
                         try:
                             added = self._add_attacktable_from_item(weapon_elem, weapon_name)
-                            if self.verbose and added:
-                                print(f"      DEBUG: Copied attack table from item for {weapon_name}")
+                            if added:
+                                log("      DEBUG: Copied attack table from item for %s", weapon_name)
                         except Exception as e:
-                            if self.verbose:
-                                print(f"      ERROR copying attack table for {weapon_name}: {e}")
+                            log("      ERROR copying attack table for %s: %s", weapon_name, e)
 
                     # Add attack table if present in weapon data (e.g., natural weapons/spells)
                     elif 'attacktable' in weapon_data:
                         attacktable_data = weapon_data['attacktable']
                         if isinstance(attacktable_data, dict):
-                            attacktable_elem = ET.SubElement(weapon_elem, 'attacktable')
+                            attacktable_elem = SubElement(weapon_elem, 'attacktable')
 
                             # Add table name
                             if 'name' in attacktable_data:
-                                name_elem = ET.SubElement(attacktable_elem, 'name')
+                                name_elem = SubElement(attacktable_elem, 'name')
                                 name_elem.set('type', 'string')
                                 if isinstance(attacktable_data['name'], dict):
                                     name_elem.text = attacktable_data['name'].get('_text', '')
@@ -309,24 +462,20 @@ class NPCGenerator:
 
                             # Add table ID
                             if 'tableid' in attacktable_data:
-                                tableid_elem = ET.SubElement(attacktable_elem, 'tableid')
+                                tableid_elem = SubElement(attacktable_elem, 'tableid')
                                 tableid_elem.set('type', 'string')
                                 if isinstance(attacktable_data['tableid'], dict):
                                     tableid_elem.text = attacktable_data['tableid'].get('_text', '')
                                 else:
                                     tableid_elem.text = str(attacktable_data['tableid'])
 
-                            if self.verbose:
-                                print(f"      DEBUG: Added attack table for {weapon_name}")
+                            log("      DEBUG: Added attack table for %s", weapon_name)
 
                     # Add count if specified
                     if 'count' in weapon_data:
-                        count = ET.SubElement(weapon_elem, 'count')
+                        count = SubElement(weapon_elem, 'count')
                         count.set('type', 'number')
-                        if isinstance(weapon_data['count'], dict):
-                            count.text = str(weapon_data['count'].get('_text', '1'))
-                        else:
-                            count.text = str(weapon_data['count'])
+                        count.text = _weapon_count_text(weapon_data)
                 else:
                     # Weapon not in module, embed full data
                     self.dict_to_xml(weapon_data, weapon_elem)
@@ -377,15 +526,19 @@ class NPCGenerator:
                 return
         
         # Priority 2: Check for file-based tokens
-        # Normalize the NPC name to match token filenames
-        normalized_name = self.loader.normalize_npc_name(npc_name)
+        if not self.loader.tokens:
+            return
+        
+        # Normalize the NPC name to match token filenames (once per name)
+        tokens = self._token_index.get(npc_name)
+        if tokens is None:
+            normalized_name = self.loader.normalize_npc_name(npc_name)
+            tokens = self._token_index[npc_name] = self.loader.tokens.get(normalized_name, {})
         
         # Check if we have tokens for this NPC
-        if normalized_name not in self.loader.tokens:
+        if not tokens:
             return
         
-        tokens = self.loader.tokens[normalized_name]
-        
         # Add picture token if available
         if 'picture' in tokens:
             picture = ET.SubElement(npc_elem, 'picture')
@@ -424,56 +577,47 @@ class NPCGenerator:
         # 3. Use the name as-is
         base_type = npc_data.get('_based_on', npc_name)  # Check metadata first
         
-        if self.verbose:
-            print(f"    DEBUG: Checking weapons for '{npc_name}', base_type='{base_type}', has _based_on: {'_based_on' in npc_data}")
+        self._log("    DEBUG: Checking weapons for '%s', base_type='%s', has _based_on: %s",
+                  npc_name, base_type, '_based_on' in npc_data)
         
-        if ' Level ' in base_type:
-            base_type = base_type.split(' Level ')[0]
+        base_type = base_type.partition(' Level ')[0]
         
         # Check if we have default weapons for this type
         if base_type not in self.default_weapons:
-            if self.verbose:
-                print(f"    DEBUG: No default weapons found for '{base_type}'")
+            self._log("    DEBUG: No default weapons found for '%s'", base_type)
             return npc_data
         
-        default_config = self.default_weapons[base_type]
-        if 'weapons' not in default_config:
+        weapon_plan = self._weapon_plan_cache.get(base_type)
+        if weapon_plan is None:
             return npc_data
+        plan, assigned_slots = weapon_plan
         
-        # Find melee and missile placeholders
+        # Find melee and missile placeholders (the last of each wins, so scan
+        # from the end and stop once both are found)
         weapons = npc_data['weapons']
         melee_key = None
         missile_key = None
         
-        for weapon_id, weapon_data in weapons.items():
+        for weapon_id, weapon_data in reversed(weapons.items()):
             if weapon_id.startswith('_'):
                 continue
             if isinstance(weapon_data, dict):
-                weapon_name = weapon_data.get('name', {}).get('_text', weapon_data.get('name', '')).lower()
-                if weapon_name in ['melee', 'weapon']:  # "Weapon" is also a melee placeholder
-                    melee_key = weapon_id
+                weapon_name = _wname(weapon_data)
+                if weapon_name in _MELEE_NAMES:
+                    if melee_key is None:
+                        melee_key = weapon_id
                 elif weapon_name == 'missile':
-                    missile_key = weapon_id
-        
-        # Apply default weapons
-        weapons_to_assign = {}  # slot -> weapon config
-        for default_weapon in default_config['weapons']:
-            slot = default_weapon.get('slot', 'melee')
-            weapons_to_assign[slot] = default_weapon
+                    if missile_key is None:
+                        missile_key = weapon_id
+                if melee_key is not None and missile_key is not None:
+                    break
         
         # Replace or remove weapons based on defaults
-        for default_weapon in default_config['weapons']:
-            weapon_name = default_weapon['name']
-            slot = default_weapon.get('slot', 'melee')
-            ob_modifier = default_weapon.get('ob_modifier', 0)
-            
-            target_key = None
-            if slot == 'melee' and melee_key:
-                target_key = melee_key
-            elif slot == 'missile' and missile_key:
-                target_key = missile_key
-            elif slot == 'shield':
-                # Shields go in a new slot
+        # slot -> placeholder key to replace; shields go in a new slot
+        slot_targets = {'melee': melee_key, 'missile': missile_key, 'shield': _NEW_SLOT}
+        for slot, weapon_name, ob_modifier, name_field in plan:
+            target_key = slot_targets.get(slot)
+            if target_key is _NEW_SLOT:
                 target_key = f"id-{len(weapons) + 1:05d}"
             
             if target_key:
@@ -488,36 +632,47 @@ class NPCGenerator:
                 
                 # Create weapon entry
                 weapons[target_key] = {
-                    'name': {'@type': 'string', '_text': weapon_name},
+                    'name': name_field,
                     'ob': {'@type': 'number', '_text': str(base_ob + ob_modifier)}
                 }
                 
                 if self.verbose:
                     mod_str = f" ({ob_modifier:+d})" if ob_modifier != 0 else ""
-                    print(f"    Assigned {weapon_name} to {npc_name} (OB {base_ob + ob_modifier}{mod_str})")
+                    self._log("    Assigned %s to %s (OB %d%s)", weapon_name, npc_name, base_ob + ob_modifier, mod_str)
         
         # Remove missile weapon if no missile weapon in defaults (e.g., spell users with staff only)
-        if missile_key and 'missile' not in weapons_to_assign:
-            if self.verbose:
-                print(f"    Removed missile weapon from {npc_name} (not in default weapons)")
+        if missile_key and 'missile' not in assigned_slots:
+            self._log("    Removed missile weapon from %s (not in default weapons)", npc_name)
             del weapons[missile_key]
         
         return npc_data
     
-    def create_npc_from_library(self, npc_data: Dict, use_item_refs: bool = True, yaml_npc: Dict = None) -> ET.Element:
+    def create_npc_from_library(self, npc_data: Dict, parent: ET.Element, npc_id: str,
+                                use_item_refs: bool = True, yaml_npc: Dict = None) -> ET.Element:
         """
         Create NPC element from complete library data
         
-        Note: The caller must assign the element's tag (ID) after creation
+        The element is created directly under parent so it is populated in
+        place; with lxml, building a detached element and appending it to a
+        large <npc> root later costs a cross-document merge.
+        
+        npc_data is not modified: default weapons, YAML overrides and token
+        cleanup are applied to a clone, so one NPC's edits never leak into
+        the library entry (and so into later NPCs, or differ between serial
+        and --jobs runs, where each worker edits its own copy).
         
         Args:
             npc_data: Complete NPC dictionary from library
+            parent: Element to create the NPC under (the <npc> root)
+            npc_id: Tag (ID) for the NPC element
             use_item_refs: If True, use item references where possible
             yaml_npc: Optional YAML NPC specification (for tokens, etc.)
             
         Returns:
-            XML Element with complete stat block (tag will be temporary)
+            XML Element with complete stat block
         """
+        npc_data = _clone_entry(npc_data)
+        
         # Apply default weapons if configured
         npc_name = npc_data.get('_display_name', '')
         if npc_name and self.default_weapons:
@@ -544,9 +699,9 @@ class NPCGenerator:
                 bonus = weapon_spec.get('bonus', 0)
                 
                 # Find weapon in item library
-                weapon_result = self.library.find_item(weapon_name)
+                weapon_result = self._find_item_cached(weapon_name)
                 if weapon_result['found']:
-                    weapon_data = weapon_result['entry'].copy()
+                    weapon_data = _clone_entry(weapon_result['entry'])
                     # Set custom OB if specified
                     if ob:
                         weapon_data['ob'] = {'@type': 'number', '_text': str(ob)}
@@ -570,8 +725,8 @@ class NPCGenerator:
                     'missile': {'@type': 'number', '_text': str(missile_bonus)}
                 }
         
-        # Create element with temporary tag (caller will set the real ID)
-        npc_elem = ET.Element('temp')
+        # Create element in place under the destination parent
+        npc_elem = ET.SubElement(parent, npc_id)
         
         # Remove token fields from npc_data so FG generates letter badges automatically
         # Empty token fields from library data prevent FG's auto-generation
@@ -595,7 +750,8 @@ class NPCGenerator:
         
         return npc_elem
     
-    def create_npc_from_yaml(self, yaml_npc: Dict) -> ET.Element:
+    def create_npc_from_yaml(self, yaml_npc: Dict, parent: ET.Element,
+                             npc_id: str = None) -> ET.Element:
         """
         Create NPC from YAML specification
         
@@ -606,6 +762,8 @@ class NPCGenerator:
         
         Args:
             yaml_npc: NPC specification from YAML
+            parent: Element to create the NPC under (the <npc> root)
+            npc_id: Preassigned ID (parallel generation); next ID if omitted
             
         Returns:
             XML Element or None if not found
@@ -616,12 +774,13 @@ class NPCGenerator:
             return None
         
         # Get next ID BEFORE creating
-        npc_id = self.get_next_id()
+        if npc_id is None:
+            npc_id = self.get_next_id()
         
         # Case 1 & 2: Find existing NPC
         if 'based_on' not in yaml_npc:
             level = yaml_npc.get('level')
-            result = self.library.find_npc(npc_name, level)
+            result = self._find_npc_cached(npc_name, level)
             
             if not result['found']:
                 print(f"  WARNING: NPC '{npc_name}' not found in library")
@@ -636,9 +795,8 @@ class NPCGenerator:
             self.loader.name_to_id['npc'][npc_name] = npc_id
             
             # Create XML from library data (with item references)
-            npc_elem = self.create_npc_from_library(result['entry'], use_item_refs=True, yaml_npc=yaml_npc)
-            # Update the element's tag to the assigned ID
-            npc_elem.tag = npc_id
+            npc_elem = self.create_npc_from_library(result['entry'], parent, npc_id,
+                                                    use_item_refs=True, yaml_npc=yaml_npc)
             self.ensure_auto_letter_token(npc_elem, npc_id, npc_name)
             return npc_elem
         
@@ -680,12 +838,65 @@ class NPCGenerator:
             self.loader.name_to_id['npc'][npc_name] = npc_id
             
             # Create XML from custom data (with item references)
-            npc_elem = self.create_npc_from_library(result['entry'], use_item_refs=True, yaml_npc=yaml_npc)
-            # Update the element's tag to the assigned ID
-            npc_elem.tag = npc_id
+            npc_elem = self.create_npc_from_library(result['entry'], parent, npc_id,
+                                                    use_item_refs=True, yaml_npc=yaml_npc)
             self.ensure_auto_letter_token(npc_elem, npc_id, npc_name)
             return npc_elem
     
+    def _generate_npcs(self, yaml_npcs, npc_root: ET.Element):
+        """
+        Create NPCs under npc_root in order, yielding each spec that succeeded
+        
+        Uses worker processes when self.jobs > 1 (see _generate_npcs_parallel)
+        """
+        use_pool = (
+            self.jobs > 1 and len(yaml_npcs) > 1
+            and 'fork' in multiprocessing.get_all_start_methods()
+        )
+        if use_pool:
+            if self.verbose:
+                print(f"  Using {self.jobs} worker processes")
+            yield from self._generate_npcs_parallel(yaml_npcs, npc_root)
+            return
+        
+        for yaml_npc in yaml_npcs:
+            if self.create_npc_from_yaml(yaml_npc, npc_root) is not None:
+                yield yaml_npc
+    
+    def _generate_npcs_parallel(self, yaml_npcs, npc_root: ET.Element):
+        """
+        Build NPC XML in worker processes, then merge it in YAML order
+        
+        Workers are forked so they inherit the library and item data without
+        pickling. IDs are handed out here exactly as the serial pass would
+        (every named NPC consumes one, found or not); the NPC name -> ID
+        mapping and generated letter tokens are recorded on success.
+        """
+        global _POOL_GENERATOR
+        
+        tasks = [(yaml_npc, self.get_next_id() if yaml_npc.get('name') else None)
+                 for yaml_npc in yaml_npcs]
+        
+        _POOL_GENERATOR = self
+        try:
+            ctx = multiprocessing.get_context('fork')
+            with ProcessPoolExecutor(max_workers=self.jobs, mp_context=ctx) as pool:
+                rendered = list(pool.map(_render_npc_in_worker, tasks))
+        finally:
+            _POOL_GENERATOR = None
+        
+        for (yaml_npc, npc_id), built in zip(tasks, rendered):
+            if built is None:
+                continue
+            npc_xml, initial = built
+            self.loader.name_to_id['npc'][yaml_npc['name']] = npc_id
+            if initial is not None:
+                if not hasattr(self.loader, 'generated_tokens'):
+                    self.loader.generated_tokens = {}
+                self.loader.generated_tokens[f"tokens/{npc_id}.png"] = initial
+            npc_root.append(ET.fromstring(npc_xml))
+            yield yaml_npc
+    
     def generate(self):
         """Generate the complete <npc> section"""
         if self.verbose:
@@ -694,8 +905,11 @@ class NPCGenerator:
         # Create root npc element
         npc_root = ET.Element('npc')
         
+        # Bind item data for attacktable copies once per run
+        self._resolve_created_items()
+        
         # Track which NPCs we've already generated
-        generated_npcs = {}  # name -> npc_id mapping
+        generated_npcs = set()  # names of NPCs generated so far
         
         # Step 1: Generate custom NPCs from npcs.yaml
         custom_count = 0
@@ -703,46 +917,40 @@ class NPCGenerator:
             if self.verbose:
                 print(f"  Processing {len(self.loader.npcs)} custom NPCs from npcs.yaml...")
             
-            for yaml_npc in self.loader.npcs:
-                npc_elem = self.create_npc_from_yaml(yaml_npc)
-                if npc_elem is not None:
-                    # Append to tree (this sets the real ID tag)
-                    npc_root.append(npc_elem)
-                    custom_count += 1
-                    # Track this NPC by name (tag is now set by append)
-                    npc_name = yaml_npc.get('name')
-                    if npc_name:
-                        generated_npcs[npc_name] = True  # Just mark as generated
+            for yaml_npc in self._generate_npcs(self.loader.npcs, npc_root):
+                custom_count += 1
+                # Track this NPC by name
+                npc_name = yaml_npc.get('name')
+                if npc_name:
+                    generated_npcs.add(npc_name)
         
         # Step 2: Collect unique NPCs from encounters
         encounter_npcs = {}  # name -> {level, based_on, display_name} mapping
-        if self.loader.encounters:
-            for encounter in self.loader.encounters:
-                for npc_ref in encounter.get('npcs', []):
-                    npc_name = npc_ref.get('creature') or npc_ref.get('name')
-                    display_name = npc_ref.get('display_name')
-                    
-                    # If display_name is provided, use it as the actual NPC name
-                    # and set based_on to the original npc_name
-                    if display_name:
-                        final_name = display_name
-                        final_based_on = npc_ref.get('based_on') or npc_name
-                    else:
-                        final_name = npc_name
-                        final_based_on = npc_ref.get('based_on')
-                    
-                    if final_name and final_name not in generated_npcs:
-                        # Store unique NPC with its details
-                        key = final_name
-                        if npc_ref.get('level'):
-                            key = f"{final_name}_L{npc_ref['level']}"
-                        
-                        if key not in encounter_npcs:
-                            encounter_npcs[key] = {
-                                'name': final_name,
-                                'level': npc_ref.get('level'),
-                                'based_on': final_based_on
-                            }
+        add_encounter_npc = encounter_npcs.setdefault
+        for encounter in self.loader.encounters or ():
+            for npc_ref in encounter.get('npcs') or ():
+                get = npc_ref.get
+                npc_name = get('creature') or get('name')
+                display_name = get('display_name')
+                
+                # If display_name is provided, use it as the actual NPC name
+                # and set based_on to the original npc_name
+                if display_name:
+                    final_name = display_name
+                    final_based_on = get('based_on') or npc_name
+                else:
+                    final_name = npc_name
+                    final_based_on = get('based_on')
+                
+                if final_name and final_name not in generated_npcs:
+                    # Store unique NPC with its details (first reference wins)
+                    level = get('level')
+                    key = f"{final_name}_L{level}" if level else final_name
+                    add_encounter_npc(key, {
+                        'name': final_name,
+                        'level': level,
+                        'based_on': final_based_on
+                    })
         
         # Step 3: Generate NPCs from encounters
         encounter_count = 0
@@ -750,7 +958,9 @@ class NPCGenerator:
             if self.verbose:
                 print(f"  Processing {len(encounter_npcs)} unique NPCs from encounters...")
             
-            for key, npc_info in encounter_npcs.items():
+            encounter_specs = []
+            add_spec = encounter_specs.append
+            for npc_info in encounter_npcs.values():
                 npc_name = npc_info['name']
                 level = npc_info['level']
                 based_on = npc_info['based_on']
@@ -761,14 +971,13 @@ class NPCGenerator:
                     yaml_npc['level'] = level
                 if based_on:
                     yaml_npc['based_on'] = based_on
-                
-                # Generate the NPC
-                npc_elem = self.create_npc_from_yaml(yaml_npc)
-                if npc_elem is not None:
-                    npc_root.append(npc_elem)
-                    encounter_count += 1
-                    # Track this NPC by name for battle references
-                    generated_npcs[npc_name] = True  # Just mark as generated
+                add_spec(yaml_npc)
+            
+            # Generate the NPCs
+            for yaml_npc in self._generate_npcs(encounter_specs, npc_root):
+                encounter_count += 1
+                # Track this NPC by name for battle references
+                generated_npcs.add(yaml_npc['name'])
         
         if self.verbose:
             print(f"  [OK] Generated {custom_count} custom NPCs")
@@ -781,9 +990,11 @@ class NPCGenerator:
         return npc_root
     
     def to_xml_string(self, root):
-        """Convert element tree to formatted XML string"""
-        from xml.dom import minidom
+        """
+        Convert element tree to formatted XML string
         
-        rough_string = ET.tostring(root, encoding='unicode')
-        reparsed = minidom.parseString(rough_string)
-        return reparsed.toprettyxml(indent="\t")
+        Indents a copy, so root itself is left untouched (no minidom re-parse)
+        """
+        root = copy.deepcopy(root)
+        ET.indent(root, space="\t")
+        return ET.tostring(root, encoding='unicode')
@@ -3,15 +3,36 @@ Story XML Generator - Generate <reference><refmanualdata> section (stories) from
 Note: Fantasy Grounds uses <reference><refmanualdata> with <blocks> for Stories
 """
 
-import xml.etree.ElementTree as ET
+import copy
+from .xmltree import ET
 
 class StoryGenerator:
+    # Link section type -> (link class / recordname prefix, section name field,
+    #                       loader.name_to_id table, default link text label)
+    # link_npc is handled separately (library references)
+    _LINK_SPECS = {
+        'link_encounter': ('battle', 'encounter_name', 'encounter', 'Encounter'),
+        'link_item': ('item', 'item_name', 'item', 'Item'),
+        'link_parcel': ('treasureparcel', 'parcel_name', 'parcel', 'Treasure'),
+        'link_image': ('image', 'image_name', 'image', 'Map'),
+    }
+    
+    # Text section type -> (block frame, formattedtext content tag)
+    _TEXT_SPECS = {
+        'header': ('text4', 'h'),           # Header frame
+        'read_aloud': ('text2', 'frame'),   # Read-aloud frame
+    }
+    _TEXT_DEFAULT = ('noframe', 'p')        # gm_notes or other: no frame
+    
     def __init__(self, loader, library, verbose=False):
         self.loader = loader
         self.library = library
         self.verbose = verbose
         self.next_id = 1
         self.block_next_id = 1
+        self._recordname_cache = {}  # NPC name -> link recordname
+        self._story_elements = {}    # id(story dict) -> built story element
+        self._reference_root = None  # <reference> section, once generated
     
     def get_next_id(self):
         """Get next story ID"""
@@ -25,6 +46,26 @@ class StoryGenerator:
         self.block_next_id += 1
         return block_id
     
+    def _npc_recordname(self, npc_name):
+        """
+        Get the link recordname for an NPC, resolved once per name
+        
+        Library NPCs link into the Character Law reference module; others
+        link to the module's own NPC (by ID, or by name slug if not generated).
+        NPC generation has finished by the time stories are built, so the
+        result for a name can't change.
+        """
+        recordname = self._recordname_cache.get(npc_name)
+        if recordname is None:
+            result = self.library.find_npc(npc_name)
+            if result.get('found') or result.get('suggestions'):
+                recordname = f'reference.npcs.{npc_name.lower().replace(" ", "")}@Character Law'
+            else:
+                npc_id = self.loader.name_to_id['npc'].get(npc_name)
+                recordname = f'npc.{npc_id}' if npc_id else f'npc.{npc_name.lower().replace(" ", "_")}'
+            self._recordname_cache[npc_name] = recordname
+        return recordname
+    
     def format_text_content(self, text):
         """Format text content, converting \n to actual line breaks"""
         if not text:
@@ -51,12 +92,8 @@ class StoryGenerator:
         frame.set('type', 'string')
         
         section_type = section.get('type')
-        if section_type == 'header':
-            frame.text = 'text4'  # Header frame
-        elif section_type == 'read_aloud':
-            frame.text = 'text2'  # Read-aloud frame
-        else:
-            frame.text = 'noframe'  # No frame for GM notes
+        frame_text, content_tag = self._TEXT_SPECS.get(section_type, self._TEXT_DEFAULT)
+        frame.text = frame_text
         
         # Text content
         text_elem = ET.SubElement(block, 'text')
@@ -64,15 +101,8 @@ class StoryGenerator:
         
         text_content = self.format_text_content(section.get('text', ''))
         
-        if section_type == 'header':
-            h = ET.SubElement(text_elem, 'h')
-            h.text = text_content
-        elif section_type == 'read_aloud':
-            frame_elem = ET.SubElement(text_elem, 'frame')
-            frame_elem.text = text_content
-        else:  # gm_notes or other
-            p = ET.SubElement(text_elem, 'p')
-            p.text = text_content
+        content = ET.SubElement(text_elem, content_tag)
+        content.text = text_content
         
         return block
     
@@ -105,54 +135,36 @@ class StoryGenerator:
         
         section_type = section.get('type')
         
-        if section_type == 'link_encounter':
-            link.set('class', 'battle')
-            enc_name = section.get('encounter_name')
-            enc_id = self.loader.name_to_id['encounter'].get(enc_name)
-            if enc_id:
-                link.set('recordname', f'battle.{enc_id}')
-            link.text = section.get('link_text', f'Encounter: {enc_name}')
-        
-        elif section_type == 'link_npc':
+        if section_type == 'link_npc':
             link.set('class', 'npc')
             npc_name = section.get('npc_name')
-            result = self.library.find_npc(npc_name)
-            if result.get('found') or result.get('suggestions'):
-                recordname = f'reference.npcs.{npc_name.lower().replace(" ", "")}@Character Law'
-            else:
-                npc_id = self.loader.name_to_id['npc'].get(npc_name)
-                recordname = f'npc.{npc_id}' if npc_id else f'npc.{npc_name.lower().replace(" ", "_")}'
-            link.set('recordname', recordname)
+            link.set('recordname', self._npc_recordname(npc_name))
             link.text = section.get('link_text', f'NPC: {npc_name}')
         
-        elif section_type == 'link_item':
-            link.set('class', 'item')
-            item_name = section.get('item_name')
-            item_id = self.loader.name_to_id['item'].get(item_name)
-            if item_id:
-                link.set('recordname', f'item.{item_id}')
-            link.text = section.get('link_text', f'Item: {item_name}')
-        
-        elif section_type == 'link_parcel':
-            link.set('class', 'treasureparcel')
-            parcel_name = section.get('parcel_name')
-            parcel_id = self.loader.name_to_id['parcel'].get(parcel_name)
-            if parcel_id:
-                link.set('recordname', f'treasureparcel.{parcel_id}')
-            link.text = section.get('link_text', f'Treasure: {parcel_name}')
-        
-        elif section_type == 'link_image':
-            link.set('class', 'image')
-            image_name = section.get('image_name')
-            image_id = self.loader.name_to_id['image'].get(image_name)
-            if image_id:
-                link.set('recordname', f'image.{image_id}')
-            link.text = section.get('link_text', f'Map: {image_name}')
+        else:
+            spec = self._LINK_SPECS.get(section_type)
+            if spec:
+                link_class, name_field, id_table, label = spec
+                link.set('class', link_class)
+                target_name = section.get(name_field)
+                target_id = self.loader.name_to_id[id_table].get(target_name)
+                if target_id:
+                    link.set('recordname', f'{link_class}.{target_id}')
+                link.text = section.get('link_text', f'{label}: {target_name}')
         
         return block
     
     def create_story(self, story):
-        """Create a story element (refmanualdata entry)"""
+        """
+        Create a story element (refmanualdata entry)
+        
+        A story is built once per generator: calling again for the same
+        story returns the same element and ID instead of allocating new ones
+        """
+        story_elem = self._story_elements.get(id(story))
+        if story_elem is not None and '_id' in story:
+            return story_elem
+        
         story_id = self.get_next_id()
         story_elem = ET.Element(story_id)
         
@@ -183,10 +195,19 @@ class StoryGenerator:
         text = ET.SubElement(story_elem, 'text')
         text.set('type', 'formattedtext')
         
+        self._story_elements[id(story)] = story_elem
         return story_elem
     
     def generate(self):
-        """Generate the complete <reference> section with <refmanualdata>"""
+        """
+        Generate the complete <reference> section with <refmanualdata>
+        
+        Repeat calls return the section already built, so story IDs and
+        the story name -> ID table stay stable
+        """
+        if self._reference_root is not None:
+            return self._reference_root
+        
         if not self.loader.stories:
             return None
         
@@ -207,12 +228,16 @@ class StoryGenerator:
         if self.verbose:
             print(f"  [OK] Generated {len(self.loader.stories)} story entries")
         
+        self._reference_root = reference
         return reference
     
     def to_xml_string(self, root):
-        """Convert element tree to formatted XML string"""
-        from xml.dom import minidom
-        
-        rough_string = ET.tostring(root, encoding='utf-8')
-        reparsed = minidom.parseString(rough_string)
-        return reparsed.toprettyxml(indent="\t", encoding='utf-8').decode('utf-8')
+        """
+        Convert element tree to formatted XML string
+        
+        Indents a copy, so root itself is left untouched (no minidom re-parse).
+        The declaration matches the other db writers.
+        """
+        root = copy.deepcopy(root)
+        ET.indent(root, space="\t")
+        return '<?xml version="1.0" encoding="utf-8"?>\n' + ET.tostring(root, encoding='unicode')
@@ -5,14 +5,32 @@ NPC/Creature/Item Matching System
 Handles name resolution with multiple strategies:
 1. Exact match in library
 2. Check mapping file for aliases
-3. Fuzzy matching with reasonable limits
-4. Graceful failure with suggestions
+3. Case/whitespace-normalized match
+4. Fuzzy matching with reasonable limits
+5. Graceful failure with suggestions
 """
 
+import functools
+import heapq
+import sys
+from operator import itemgetter
 import yaml
 from typing import Optional, Dict, List, Tuple
 from difflib import SequenceMatcher
 
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+# RapidFuzz prefilters fuzzy candidates in C when installed; scores
+# always come from SequenceMatcher
+try:
+    from rapidfuzz import fuzz as _rf_fuzz, process as _rf_process
+    HAS_RAPIDFUZZ = True
+except ImportError:
+    HAS_RAPIDFUZZ = False
+
 
 class EntityMatcher:
     """Matches user-provided names to library entries"""
@@ -37,37 +55,152 @@ class EntityMatcher:
         
         # Load mappings
         with open(mapping_file, 'r') as f:
-            self.mappings = yaml.safe_load(f)
+            self.mappings = yaml.load(f, Loader=_YamlLoader)
+        
+        # Mapping sections used on every match (empty if missing), with
+        # names interned so lookups with interned query names compare by identity
+        mappings = self.mappings or {}
+        self._prof_map = self._intern_mapping(mappings.get('professions'))
+        self._creature_map = self._intern_mapping(mappings.get('creatures'))
+        self._generic_map = self._intern_mapping(mappings.get('generic_npcs'))
+        self._item_map = self._intern_mapping(mappings.get('items'))
+        
+        # Fuzzy candidate names per library:
+        # id(lib) -> (size, names, lowered names, {length: candidate indices},
+        #             {whitespace-normalized lowered name: name})
+        self._candidate_caches: Dict[int, tuple] = {}
+        
+        # Match results per (name, level) / name, for the life of this matcher
+        self._match_npc_cached = functools.lru_cache(maxsize=4096)(self._match_npc_uncached)
+        self._match_item_cached = functools.lru_cache(maxsize=4096)(self._match_item_uncached)
+    
+    @staticmethod
+    def _intern_mapping(section) -> Dict[str, str]:
+        """Copy a name -> name mapping section with its strings interned"""
+        if not section:
+            return {}
+        return {
+            (sys.intern(k) if isinstance(k, str) else k): (sys.intern(v) if isinstance(v, str) else v)
+            for k, v in section.items()
+        }
+    
+    def _get_candidate_cache(self, lib) -> Tuple[Tuple[str, ...], Tuple[str, ...], Dict[int, List[int]]]:
+        """
+        Get (names, lowercased names, length buckets) for a library's by_name index
+        
+        Built on first use and rebuilt only if the index changes size
+        """
+        size = len(lib.by_name)
+        cached = self._candidate_caches.get(id(lib))
+        if cached is None or cached[0] != size:
+            names = tuple(lib.by_name)
+            names_lower = tuple(candidate.lower() for candidate in names)
+            by_length = {}
+            by_normalized = {}
+            for idx, candidate in enumerate(names_lower):
+                by_length.setdefault(len(candidate), []).append(idx)
+                by_normalized.setdefault(' '.join(candidate.split()), names[idx])
+            cached = (size, names, names_lower, by_length, by_normalized)
+            self._candidate_caches[id(lib)] = cached
+        return cached[1], cached[2], cached[3]
+    
+    def _find_normalized(self, lib, name_lower: str) -> Tuple[Optional[str], Optional[Dict]]:
+        """
+        Look up a name ignoring case and extra whitespace
+        
+        Catches the most common near-miss without a fuzzy scan
+        
+        Returns:
+            (library name, entry), or (None, None) if there is no such name
+        """
+        self._get_candidate_cache(lib)
+        by_normalized = self._candidate_caches[id(lib)][4]
+        lib_name = by_normalized.get(' '.join(name_lower.split()))
+        if lib_name is None:
+            return None, None
+        return lib_name, lib.find_by_name(lib_name)
+    
+    def _fuzzy_candidates(self, lib, name_lower: str,
+                          threshold: float = None) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+        """
+        Get the library names whose length can still reach threshold
+        
+        SequenceMatcher.ratio is at most
+        2*min(len_a, len_b) / (len_a + len_b), so names too much shorter or
+        longer than the query are skipped without scoring. Library order is
+        preserved so ties rank exactly as in a full scan.
+        """
+        if threshold is None:
+            threshold = self.FUZZY_THRESHOLD
+        
+        names, names_lower, by_length = self._get_candidate_cache(lib)
+        query_len = len(name_lower)
+        indices = []
+        for length, bucket in by_length.items():
+            total = query_len + length
+            if total and 2 * min(query_len, length) / total >= threshold - 1e-9:
+                indices.extend(bucket)
+        
+        if len(indices) == len(names):
+            return names, names_lower
+        indices.sort()
+        return tuple(names[i] for i in indices), tuple(names_lower[i] for i in indices)
     
     def _similarity(self, a: str, b: str) -> float:
-        """Calculate similarity ratio between two strings"""
-        return SequenceMatcher(None, a.lower(), b.lower()).ratio()
+        """Calculate similarity ratio between two already-lowercased strings"""
+        return SequenceMatcher(None, a, b).ratio()
     
-    def _find_fuzzy_matches(self, name: str, candidates: List[str], 
-                           threshold: float = None) -> List[Tuple[str, float]]:
+    def _find_fuzzy_matches(self, name_lower: str, candidates: Tuple[str, ...],
+                           candidates_lower: Tuple[str, ...],
+                           threshold: float = None, limit: Optional[int] = 5) -> List[Tuple[str, float]]:
         """
         Find fuzzy matches above threshold
         
+        Args:
+            name_lower: Lowercased query name
+            candidates: Candidate names (returned in results)
+            candidates_lower: Lowercased candidates, parallel to candidates
+            threshold: Minimum similarity (FUZZY_THRESHOLD if omitted)
+            limit: Number of best matches to return (None for all)
+        
         Returns:
             List of (candidate, similarity_score) tuples, sorted by score
         """
         if threshold is None:
             threshold = self.FUZZY_THRESHOLD
         
+        if HAS_RAPIDFUZZ:
+            # RapidFuzz's ratio (Indel/LCS) is never below SequenceMatcher's,
+            # so it prefilters in C without losing any match; survivors are
+            # rescored below so results don't depend on rapidfuzz being
+            # installed. Scores come back as 0..100, best first
+            survivors = _rf_process.extract(name_lower, candidates_lower, scorer=_rf_fuzz.ratio,
+                                            processor=None, score_cutoff=threshold * 100 - 1e-6,
+                                            limit=None)
+            indices = sorted(idx for _, _, idx in survivors)
+            candidates = [candidates[idx] for idx in indices]
+            candidates_lower = [candidates_lower[idx] for idx in indices]
+        
         matches = []
-        for candidate in candidates:
-            score = self._similarity(name, candidate)
+        similarity = self._similarity
+        for candidate, candidate_lower in zip(candidates, candidates_lower):
+            score = similarity(name_lower, candidate_lower)
             if score >= threshold:
                 matches.append((candidate, score))
         
-        # Sort by score descending
-        matches.sort(key=lambda x: x[1], reverse=True)
-        return matches
+        # Best scores first (ties keep library order)
+        if limit is None:
+            matches.sort(key=itemgetter(1), reverse=True)
+            return matches
+        return heapq.nlargest(limit, matches, key=itemgetter(1))
     
     def match_npc(self, name: str, level: Optional[int] = None) -> Dict:
         """
         Match an NPC/creature name to a library entry
         
+        Results are memoized; each call returns a fresh copy of the result
+        dict (the library entry itself is shared, as before)
+        
         Args:
             name: NPC/creature name from user
             level: Optional level (uses DEFAULT_LEVEL if needed and not provided)
@@ -76,12 +209,26 @@ class EntityMatcher:
             Dictionary with:
                 - 'found': bool
                 - 'entry': NPC data dict (if found)
-                - 'method': str (exact, mapped, fuzzy, or none)
+                - 'method': str (exact, mapped, normalized, fuzzy, or none)
                 - 'original_name': str (what user requested)
                 - 'matched_name': str (what was found)
                 - 'suggestions': List[str] (if not found)
                 - 'level_used': int (what level was used)
         """
+        if type(name) is str:
+            name = sys.intern(name)
+        return self._copy_result(self._match_npc_cached(name, level))
+    
+    @staticmethod
+    def _copy_result(result: Dict) -> Dict:
+        """Copy a cached match result so callers can't alter the cache"""
+        copied = dict(result)
+        copied['suggestions'] = list(result['suggestions'])
+        return copied
+    
+    def _match_npc_uncached(self, name: str, level: Optional[int] = None) -> Dict:
+        """match_npc without memoization"""
+        name_lower = name.lower()
         result = {
             'found': False,
             'entry': None,
@@ -102,8 +249,8 @@ class EntityMatcher:
             return result
         
         # Strategy 2: Check profession mappings
-        if name in self.mappings.get('professions', {}):
-            template_name = self.mappings['professions'][name]
+        if name in self._prof_map:
+            template_name = self._prof_map[name]
             
             # Determine level to use
             if level is None:
@@ -120,8 +267,8 @@ class EntityMatcher:
                 return result
         
         # Strategy 3: Check creature aliases
-        if name in self.mappings.get('creatures', {}):
-            alias_target = self.mappings['creatures'][name]
+        if name in self._creature_map:
+            alias_target = self._creature_map[name]
             entry = self.npc_lib.find_by_name(alias_target)
             if entry:
                 result['found'] = True
@@ -131,8 +278,8 @@ class EntityMatcher:
                 return result
         
         # Strategy 4: Check generic NPC types
-        if name in self.mappings.get('generic_npcs', {}):
-            template_name = self.mappings['generic_npcs'][name]
+        if name in self._generic_map:
+            template_name = self._generic_map[name]
             
             # Determine level
             if level is None:
@@ -152,9 +299,18 @@ class EntityMatcher:
                 result['matched_name'] = entry.get('_display_name', template_name)
                 return result
         
-        # Strategy 5: Fuzzy matching
-        all_names = list(self.npc_lib.by_name.keys())
-        fuzzy_matches = self._find_fuzzy_matches(name, all_names)
+        # Strategy 5: Case/whitespace-normalized exact match
+        lib_name, entry = self._find_normalized(self.npc_lib, name_lower)
+        if entry:
+            result['found'] = True
+            result['entry'] = entry
+            result['method'] = 'normalized'
+            result['matched_name'] = entry.get('_display_name', lib_name)
+            return result
+        
+        # Strategy 6: Fuzzy matching
+        all_names, all_names_lower = self._fuzzy_candidates(self.npc_lib, name_lower)
+        fuzzy_matches = self._find_fuzzy_matches(name_lower, all_names, all_names_lower)
         
         if fuzzy_matches:
             # Take best match
@@ -184,6 +340,13 @@ class EntityMatcher:
         Returns:
             Dictionary with matching info (similar to match_npc)
         """
+        if type(name) is str:
+            name = sys.intern(name)
+        return self._copy_result(self._match_item_cached(name))
+    
+    def _match_item_uncached(self, name: str) -> Dict:
+        """match_item without memoization"""
+        name_lower = name.lower()
         result = {
             'found': False,
             'entry': None,
@@ -203,8 +366,8 @@ class EntityMatcher:
             return result
         
         # Strategy 2: Check item aliases
-        if name in self.mappings.get('items', {}):
-            alias_target = self.mappings['items'][name]
+        if name in self._item_map:
+            alias_target = self._item_map[name]
             entry = self.item_lib.find_by_name(alias_target)
             if entry:
                 result['found'] = True
@@ -213,9 +376,18 @@ class EntityMatcher:
                 result['matched_name'] = entry.get('_display_name', alias_target)
                 return result
         
-        # Strategy 3: Fuzzy matching
-        all_names = list(self.item_lib.by_name.keys())
-        fuzzy_matches = self._find_fuzzy_matches(name, all_names)
+        # Strategy 3: Case/whitespace-normalized exact match
+        lib_name, entry = self._find_normalized(self.item_lib, name_lower)
+        if entry:
+            result['found'] = True
+            result['entry'] = entry
+            result['method'] = 'normalized'
+            result['matched_name'] = entry.get('_display_name', lib_name)
+            return result
+        
+        # Strategy 4: Fuzzy matching
+        all_names, all_names_lower = self._fuzzy_candidates(self.item_lib, name_lower)
+        fuzzy_matches = self._find_fuzzy_matches(name_lower, all_names, all_names_lower)
         
         if fuzzy_matches:
             best_match_name, score = fuzzy_matches[0]
@@ -313,11 +485,11 @@ class EntityMatcher:
 
 # Example usage
 if __name__ == "__main__":
-    from npc_creature_library_complete import CompleteNPCCreatureLibrary
+    from npc_creature_library_complete import get_library
     from item_library_complete import CompleteItemLibrary
     
     # Initialize
-    npc_lib = CompleteNPCCreatureLibrary()
+    npc_lib = get_library()
     item_lib = CompleteItemLibrary()
     matcher = EntityMatcher(npc_lib, item_lib)
     
@@ -10,9 +10,14 @@ SOURCE PRIORITY HIERARCHY (when multiple sources have the same name):
 4. Creatures & Treasures (lowest priority)
 """
 
-import json
-import copy
-from typing import Dict, List, Optional
+import sys
+from operator import itemgetter
+from typing import Dict, Iterator, List, Optional
+
+try:
+    from .jsondata import load_json
+except ImportError:
+    from jsondata import load_json
 
 
 class CompleteItemLibrary:
@@ -27,77 +32,111 @@ class CompleteItemLibrary:
         'Creatures & Treasures': 4
     }
     
+    # Low-cardinality string fields interned at index time, so the many
+    # entries share one string object per value
+    INTERNED_FIELDS = ('_source_module', '_equipment_group', '_weapon_group')
+    
     def __init__(self, json_path: str = '/mnt/user-data/outputs/items_complete.json'):
         """Load the complete item data"""
-        with open(json_path, 'r') as f:
-            self.data = json.load(f)
+        self.data = load_json(json_path)
         
         # Build quick lookup indexes with priority
         self._build_indexes()
     
     def _get_priority(self, source: str) -> int:
-        """Get priority value for a source (lower is better)"""
+        """
+        Get priority value for a source (lower is better)
+        
+        Indexed entries carry this precomputed as entry['_priority']
+        """
         return self.SOURCE_PRIORITY.get(source, 999)
     
     def _build_indexes(self):
         """Build indexes for fast lookups with source priority"""
         self.by_name = {}  # Will store highest priority version only
-        self.by_name_all = {}  # Will store all versions
+        self.by_name_all = {}  # Will store all versions, sorted by priority
         self.by_id = {}
         self.by_group = {}
+        self.by_source_name = {}  # source -> name -> first version from that source
+        
+        # Lookup memos, valid until the indexes are rebuilt
+        self._find_cache = {}         # (name, preferred_source) -> entry or None
+        self._source_info_cache = {}  # name -> get_source_info result
         
         # Collect all entries with their sources
+        data = self.data
         all_entries = []
-        
-        # Add Character Law Equipment
-        for item in self.data['character_law_equipment']['items']:
-            all_entries.append(item)
-        
-        # Add Arms Law Weapons
-        for item in self.data['arms_law_weapons']['items']:
-            all_entries.append(item)
-        
-        # Add Creatures & Treasures Items
-        for item in self.data['creatures_treasures_items']['items']:
-            all_entries.append(item)
+        for section in ('character_law_equipment', 'arms_law_weapons', 'creatures_treasures_items'):
+            all_entries.extend(data[section]['items'])
         
         # Add MERP Herbs (if available)
-        if 'merp_herbs' in self.data:
-            for item in self.data['merp_herbs']['items']:
-                all_entries.append(item)
+        if 'merp_herbs' in data:
+            all_entries.extend(data['merp_herbs']['items'])
         
         # Now index everything, applying priority rules
+        by_name = self.by_name
+        by_name_all = self.by_name_all
+        by_id = self.by_id
+        by_group = self.by_group
+        by_source_name = self.by_source_name
+        prio_map = self.SOURCE_PRIORITY
+        interned_fields = self.INTERNED_FIELDS
+        intern = sys.intern
         for entry in all_entries:
-            name = entry.get('_display_name', '').lower()
-            source = entry.get('_source_module', '')
-            entry_id = entry.get('_id', '')
+            get = entry.get
+            for field in interned_fields:
+                value = get(field)
+                if value.__class__ is str:
+                    entry[field] = intern(value)
+            name = intern(get('_display_name', '').lower())
+            source = get('_source_module', '')
+            
+            # Stamp source priority once for comparisons and sorting
+            priority = prio_map.get(source, 999)
+            entry['_priority'] = priority
+            
+            # Stamp lowercased type/subtype text for search_by_type
+            # ('' if missing, None if not a text field)
+            type_val = get('type', {})
+            entry['_type_lc'] = type_val.get('_text', '').lower() if isinstance(type_val, dict) else None
+            subtype_val = get('subtype', {})
+            entry['_subtype_lc'] = subtype_val.get('_text', '').lower() if isinstance(subtype_val, dict) else None
             
             # Always index by ID (unique within source)
-            full_id = f"{source}:{entry_id}"
-            self.by_id[full_id] = entry
+            by_id[f"{source}:{get('_id', '')}"] = entry
             
-            # Index by name with priority
+            # Index by name (all versions)
             if name:
-                # Store all versions
-                if name not in self.by_name_all:
-                    self.by_name_all[name] = []
-                self.by_name_all[name].append(entry)
-                
-                # Store only highest priority version in main index
-                if name not in self.by_name:
-                    self.by_name[name] = entry
-                else:
-                    # Check priority - replace if new entry has higher priority
-                    existing_source = self.by_name[name].get('_source_module', '')
-                    if self._get_priority(source) < self._get_priority(existing_source):
-                        self.by_name[name] = entry
+                by_name_all.setdefault(name, []).append(entry)
+                by_source_name.setdefault(source, {}).setdefault(name, entry)
             
             # Index by group (equipment_group or weapon_group)
-            group = entry.get('_equipment_group') or entry.get('_weapon_group')
+            group = get('_equipment_group') or get('_weapon_group')
             if group:
-                if group not in self.by_group:
-                    self.by_group[group] = []
-                self.by_group[group].append(entry)
+                by_group.setdefault(group, []).append(entry)
+        
+        # Presort each name's versions by priority (stable, so ties keep
+        # load order); the head is the default version
+        priority_key = itemgetter('_priority')
+        for name, bucket in by_name_all.items():
+            if len(bucket) > 1:
+                bucket.sort(key=priority_key)
+            by_name[name] = bucket[0]
+        
+        # Groups are fixed once indexed, so sort them here for list_groups
+        self._sorted_groups = tuple(sorted(by_group))
+        
+        # (type, subtype, entry) rows in by_name order, so search_by_type
+        # scans flat tuples instead of indexing every entry dict
+        self._type_rows = [(entry['_type_lc'], entry['_subtype_lc'], entry) for entry in by_name.values()]
+        
+        # Trigram -> names containing it, for substring search
+        self._trigrams: Dict[str, set] = {}
+        for name in self.by_name:
+            for i in range(len(name) - 2):
+                self._trigrams.setdefault(name[i:i + 3], set()).add(name)
+        # Name -> position in by_name, so searches keep index order
+        self._name_order = {name: i for i, name in enumerate(self.by_name)}
     
     def find_by_name(self, name: str, preferred_source: str = None) -> Optional[Dict]:
         """
@@ -112,13 +151,26 @@ class CompleteItemLibrary:
         Returns:
             Dictionary with item data (highest priority source), or None if not found
         """
+        key = (name, preferred_source)
+        try:
+            return self._find_cache[key]
+        except KeyError:
+            pass
+        
+        entry = self._find_by_name_uncached(name, preferred_source)
+        self._find_cache[key] = entry
+        return entry
+    
+    def _find_by_name_uncached(self, name: str, preferred_source: str = None) -> Optional[Dict]:
+        """find_by_name without memoization"""
         name_lower = name.lower()
         
         if preferred_source:
             # User specified a preferred source
-            all_versions = self.by_name_all.get(name_lower, [])
-            for entry in all_versions:
-                if entry.get('_source_module') == preferred_source:
+            source_names = self.by_source_name.get(preferred_source)
+            if source_names:
+                entry = source_names.get(name_lower)
+                if entry is not None:
                     return entry
             # If preferred not found, fall through to default priority
         
@@ -132,11 +184,7 @@ class CompleteItemLibrary:
         Returns:
             List of entries, sorted by source priority
         """
-        name_lower = name.lower()
-        entries = self.by_name_all.get(name_lower, [])
-        
-        # Sort by priority
-        return sorted(entries, key=lambda e: self._get_priority(e.get('_source_module', '')))
+        return list(self.by_name_all.get(name.lower(), []))
     
     def get_source_info(self, name: str) -> Dict:
         """
@@ -144,27 +192,35 @@ class CompleteItemLibrary:
         
         Returns:
             Dictionary with source information and priority selection
+            (a fresh copy each call; the result is memoized per name)
         """
+        info = self._source_info_cache.get(name)
+        if info is None:
+            info = self._source_info_cache[name] = self._get_source_info_uncached(name)
+        if not info['found']:
+            return {'found': False, 'sources': []}
+        copied = dict(info)
+        copied['sources'] = [dict(source) for source in info['sources']]
+        return copied
+    
+    def _get_source_info_uncached(self, name: str) -> Dict:
+        """get_source_info without memoization"""
         name_lower = name.lower()
         all_versions = self.by_name_all.get(name_lower, [])
         
         if not all_versions:
             return {'found': False, 'sources': []}
         
-        sources = []
-        for entry in all_versions:
-            source = entry.get('_source_module', 'Unknown')
-            ref_path = entry.get('_reference_path', '')
-            priority = self._get_priority(source)
-            sources.append({
-                'source': source,
-                'reference_path': ref_path,
-                'priority': priority,
-                'is_default': (entry == self.by_name.get(name_lower))
-            })
-        
-        # Sort by priority
-        sources.sort(key=lambda s: s['priority'])
+        # Versions are presorted by priority; the first is the default
+        sources = [
+            {
+                'source': entry.get('_source_module', 'Unknown'),
+                'reference_path': entry.get('_reference_path', ''),
+                'priority': entry['_priority'],
+                'is_default': idx == 0
+            }
+            for idx, entry in enumerate(all_versions)
+        ]
         
         return {
             'found': True,
@@ -180,17 +236,35 @@ class CompleteItemLibrary:
         Search for items with names containing the search term
         Returns highest priority version for each name
         """
+        return list(self.iter_search_by_name(search_term))
+    
+    def iter_search_by_name(self, search_term: str) -> Iterator[Dict]:
+        """Lazy search_by_name, for callers that may stop early"""
         search_term = search_term.lower()
-        results = []
+        by_name = self.by_name
+        
+        if len(search_term) < 3:
+            # Too short for trigrams - scan every name
+            for name, entry in by_name.items():
+                if search_term in name:
+                    yield entry
+            return
         
-        for name, entry in self.by_name.items():
-            if search_term in name:
-                results.append(entry)
+        # Only names sharing every trigram of the term can contain it
+        candidates = None
+        for i in range(len(search_term) - 2):
+            names = self._trigrams.get(search_term[i:i + 3])
+            if not names:
+                return
+            candidates = set(names) if candidates is None else candidates & names
+            if not candidates:
+                return
         
-        return results
+        for name in sorted((name for name in candidates if search_term in name), key=self._name_order.get):
+            yield by_name[name]
     
     def get_reference_path(self, name: str, preferred_source: str = None) -> Optional[str]:
-        """Get the Fantasy Grounds reference path for an item"""
+        """Get the Fantasy Grounds reference path for an item (via the find_by_name memo)"""
         entry = self.find_by_name(name, preferred_source)
         if entry:
             return entry.get('_reference_path')
@@ -209,19 +283,23 @@ class CompleteItemLibrary:
             
         Returns:
             Complete item data with modifications applied
+            
+        The copy is shallow apart from the name fields: nested values are
+        shared with the library entry, so replace them (e.g. via
+        modifications) rather than editing them in place.
         """
         base_entry = self.find_by_name(name, preferred_source)
         if not base_entry:
             return None
         
-        # Deep copy to avoid modifying original
-        new_entry = copy.deepcopy(base_entry)
+        # Shallow copy; the name fields are rebuilt rather than edited
+        new_entry = base_entry.copy()
         
         # Update the name
         if 'name' in new_entry and isinstance(new_entry['name'], dict):
-            new_entry['name']['_text'] = new_name
+            new_entry['name'] = {**new_entry['name'], '_text': new_name}
         if 'nonid_name' in new_entry and isinstance(new_entry['nonid_name'], dict):
-            new_entry['nonid_name']['_text'] = new_name
+            new_entry['nonid_name'] = {**new_entry['nonid_name'], '_text': new_name}
         
         # Update metadata
         new_entry['_display_name'] = new_name
@@ -240,12 +318,16 @@ class CompleteItemLibrary:
     
     def list_groups(self) -> List[str]:
         """Get list of all available equipment/weapon groups"""
-        return sorted(self.by_group.keys())
+        return list(self._sorted_groups)
     
     def get_items_in_group(self, group: str) -> List[Dict]:
         """Get all items in a specific group"""
         return self.by_group.get(group, [])
     
+    def iter_items_in_group(self, group: str) -> Iterator[Dict]:
+        """Iterate the items in a specific group"""
+        return iter(self.by_group.get(group, ()))
+    
     def search_by_type(self, item_type: str) -> List[Dict]:
         """
         Search for items by type (weapon, armor, equipment, etc.)
@@ -256,25 +338,18 @@ class CompleteItemLibrary:
         Returns:
             List of matching items
         """
-        results = []
+        return list(self.iter_search_by_type(item_type))
+    
+    def iter_search_by_type(self, item_type: str) -> Iterator[Dict]:
+        """Lazy search_by_type, for callers that may stop early"""
         item_type_lower = item_type.lower()
         
-        for entry in self.by_name.values():
-            # Check various type fields
-            type_val = entry.get('type', {})
-            if isinstance(type_val, dict):
-                type_text = type_val.get('_text', '').lower()
-                if item_type_lower in type_text:
-                    results.append(entry)
-            
-            # Check subtype
-            subtype_val = entry.get('subtype', {})
-            if isinstance(subtype_val, dict):
-                subtype_text = subtype_val.get('_text', '').lower()
-                if item_type_lower in subtype_text:
-                    results.append(entry)
-        
-        return results
+        for type_text, subtype_text, entry in self._type_rows:
+            # Check type, then subtype (an entry matching both is listed twice)
+            if type_text is not None and item_type_lower in type_text:
+                yield entry
+            if subtype_text is not None and item_type_lower in subtype_text:
+                yield entry
 
 
 # Example usage
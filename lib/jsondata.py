@@ -0,0 +1,166 @@
+"""
+JSON data file loading shared by the reference libraries
+Parses with orjson when installed, otherwise the standard library json module
+
+Parsed data is cached in a pickle sidecar next to the JSON file
+(items_complete.json -> items_complete.cache.pkl) and reused while the
+JSON's exact mtime and size match those stored with it (so a JSON
+replaced by an older file, e.g. by a checkout or restore, is re-read).
+Unpickling skips all of the JSON validation work, so warm starts load
+the multi-megabyte libraries much faster. The
+cache is best effort: a missing, stale, unreadable or unwritable sidecar
+just falls back to parsing the JSON.
+
+Libraries can also cache their built indexes together with the data in
+an .idx.pkl sidecar (load_index_cache / store_index_cache), skipping
+index construction as well on warm starts.
+"""
+
+import json
+import mmap
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CACHE_SUFFIX = '.cache.pkl'
+INDEX_SUFFIX = '.idx.pkl'
+
+
+def parse_json_file(path) -> object:
+    """Parse a JSON file without consulting the cache"""
+    if orjson is not None:
+        with open(path, 'rb') as f:
+            # orjson parses straight from the mapped file, with no
+            # intermediate bytes copy (empty files cannot be mapped)
+            try:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                return orjson.loads(f.read())
+            with mapped:
+                view = memoryview(mapped)
+                try:
+                    return orjson.loads(view)
+                finally:
+                    view.release()
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def freeze_json(value) -> tuple:
+    """
+    Serialize JSON-shaped data once for repeated deep copies via thaw_json
+
+    Uses orjson when it can, otherwise pickle.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads, orjson.dumps(value)
+        except TypeError:
+            pass
+    return pickle.loads, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def thaw_json(frozen: tuple):
+    """Fresh deep copy of data serialized by freeze_json"""
+    loads, blob = frozen
+    return loads(blob)
+
+
+def load_json(path, use_cache: bool = True) -> object:
+    """
+    Load a JSON data file, via its pickle sidecar when it is fresh
+
+    Args:
+        path: Path to the JSON file
+        use_cache: Read and refresh the .cache.pkl sidecar
+
+    Returns:
+        Parsed JSON data
+    """
+    path = Path(path)
+    if not use_cache:
+        return parse_json_file(path)
+
+    cache = path.with_suffix(CACHE_SUFFIX)
+    stamp = _file_stamp(path)
+    try:
+        with open(cache, 'rb') as f:
+            cached_stamp, data = pickle.load(f)
+        if cached_stamp == stamp:
+            return data
+    except Exception:
+        # Missing, corrupt or stale-format sidecar; unpickling can raise
+        # almost anything, so just parse the JSON
+        pass
+
+    data = parse_json_file(path)
+    _write_pickle(cache, (stamp, data))
+    return data
+
+
+def load_index_cache(path, code_file) -> Optional[object]:
+    """
+    Load built indexes pickled by store_index_cache
+
+    The .idx.pkl sidecar is only used while both the JSON file and the
+    module that built the indexes (code_file) are unchanged, so editing
+    an index builder invalidates its cache.
+
+    Returns:
+        The stored payload, or None if there is no usable cache
+    """
+    cache = Path(path).with_suffix(INDEX_SUFFIX)
+    try:
+        stamp = _index_stamp(path, code_file)
+        with open(cache, 'rb') as f:
+            cached_stamp, payload = pickle.load(f)
+    except Exception:
+        # Missing, corrupt or stale-format sidecar (see load_json)
+        return None
+    return payload if cached_stamp == stamp else None
+
+
+def store_index_cache(path, code_file, payload):
+    """Pickle built indexes next to the JSON file (best effort)"""
+    try:
+        stamp = _index_stamp(path, code_file)
+    except OSError:
+        return
+    _write_pickle(Path(path).with_suffix(INDEX_SUFFIX), (stamp, payload))
+
+
+def _file_stamp(path) -> tuple:
+    """Identify one version of a file (replaced files rarely keep both)"""
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _index_stamp(path, code_file) -> tuple:
+    """Identify the versions of a JSON file and the code indexing it"""
+    return _file_stamp(path) + _file_stamp(code_file)
+
+
+def _write_pickle(target: Path, obj):
+    """Pickle obj to target (best effort)"""
+    # Write to a unique temp file first so a concurrent reader never sees
+    # a half-written sidecar and concurrent writers never share a file
+    tmp = None
+    try:
+        with tempfile.NamedTemporaryFile(dir=target.parent, prefix=target.name + '.',
+                                         suffix='.tmp', delete=False) as f:
+            tmp = f.name
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, target)
+    except (OSError, pickle.PicklingError, TypeError, AttributeError):
+        if tmp is not None:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
@@ -4,19 +4,21 @@ Reference Library - Integrated v0.11
 Provides access to complete NPC, creature, item, skill, and spell data
 """
 
-import json
+import functools
 from pathlib import Path
 from typing import Optional, Dict, List
 
 # Try relative imports first (when used as module), fall back to direct imports
 try:
-    from .npc_creature_library_complete import CompleteNPCCreatureLibrary
+    from .npc_creature_library_complete import CompleteNPCCreatureLibrary, get_library
     from .item_library_complete import CompleteItemLibrary
     from .entity_matcher import EntityMatcher
+    from .jsondata import load_json
 except ImportError:
-    from npc_creature_library_complete import CompleteNPCCreatureLibrary
+    from npc_creature_library_complete import CompleteNPCCreatureLibrary, get_library
     from item_library_complete import CompleteItemLibrary
     from entity_matcher import EntityMatcher
+    from jsondata import load_json
 
 
 class ReferenceLibrary:
@@ -29,6 +31,9 @@ class ReferenceLibrary:
     - Skills (80 skills)
     - Spell lists (162 spell lists)
     - Name matching and resolution
+    
+    Each sub-library is loaded on first access, so callers only pay
+    for the parts of the data they use.
     """
     
     VERSION = "0.11"
@@ -48,39 +53,55 @@ class ReferenceLibrary:
             data_dir = Path(data_dir)
         
         self.data_dir = data_dir
-        
-        # Initialize core libraries
-        self.npcs = CompleteNPCCreatureLibrary(
-            str(data_dir / 'npcs_and_creatures_complete.json')
-        )
-        
-        self.items = CompleteItemLibrary(
-            str(data_dir / 'items_complete.json')
+    
+    @functools.cached_property
+    def npcs(self) -> CompleteNPCCreatureLibrary:
+        """NPC and creature library (shared by every ReferenceLibrary on the same data)"""
+        return get_library(str(self.data_dir / 'npcs_and_creatures_complete.json'))
+    
+    @functools.cached_property
+    def items(self) -> CompleteItemLibrary:
+        """Item library"""
+        return CompleteItemLibrary(
+            str(self.data_dir / 'items_complete.json')
         )
-        
-        # Initialize matcher
+    
+    @functools.cached_property
+    def matcher(self) -> EntityMatcher:
+        """Name matcher (loads the NPC and item libraries)"""
         mapping_file = Path(__file__).parent / 'npc_creature_item_mappings.yaml'
-        self.matcher = EntityMatcher(
+        return EntityMatcher(
             self.npcs,
             self.items,
             str(mapping_file)
         )
+    
+    @functools.cached_property
+    def skills(self) -> Dict:
+        """Skill reference data"""
+        return self._load_skills()
+    
+    @functools.cached_property
+    def spell_lists(self) -> Dict:
+        """Spell list reference data"""
+        return self._load_spell_lists()
+    
+    def load_all(self):
+        """
+        Load every sub-library now instead of on first access
         
-        # Load skill and spell references
-        self.skills = self._load_skills()
-        self.spell_lists = self._load_spell_lists()
+        Lets callers that need all of the data surface load errors up front.
+        """
+        for attr in ('npcs', 'items', 'matcher', 'skills', 'spell_lists'):
+            getattr(self, attr)
     
     def _load_skills(self) -> Dict:
         """Load skill reference data"""
-        skill_file = self.data_dir / 'skill_references.json'
-        with open(skill_file, 'r') as f:
-            return json.load(f)
+        return load_json(self.data_dir / 'skill_references.json')
     
     def _load_spell_lists(self) -> Dict:
         """Load spell list reference data"""
-        spell_file = self.data_dir / 'spell_references.json'
-        with open(spell_file, 'r') as f:
-            return json.load(f)
+        return load_json(self.data_dir / 'spell_references.json')
     
     # NPC/Item/Skill/Spell methods remain the same...
     # (Abbreviated for space - full implementation as before)
@@ -3,9 +3,26 @@ Module Loader - Load YAML files from module directory
 """
 
 import yaml
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# libyaml-backed loader when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
 class ModuleLoader:
+    # Optional content files: (filename, root key and loader attribute, log label)
+    # images.yaml is handled by load_images, which can also auto-detect
+    OPTIONAL_FILES = (
+        ('stories.yaml', 'stories', 'entries'),
+        ('encounters.yaml', 'encounters', 'encounters'),
+        ('npcs.yaml', 'npcs', 'custom NPCs'),
+        ('items.yaml', 'items', 'items'),
+        ('parcels.yaml', 'parcels', 'parcels'),
+    )
+    
     def __init__(self, module_dir, verbose=False):
         self.module_dir = Path(module_dir)
         self.verbose = verbose
@@ -31,6 +48,11 @@ class ModuleLoader:
             'parcel': {},
             'image': {}
         }
+        
+        # Precomputed link recordnames (e.g. 'item.id-00001'), filled during generation
+        self.recordnames = {
+            'item': {}
+        }
     
     def log_error(self, message):
         """Log an error"""
@@ -44,21 +66,34 @@ class ModuleLoader:
         if self.verbose:
             print(f"  WARNING: {message}")
     
-    def load_yaml_file(self, filename):
-        """Load a YAML file from module directory"""
-        filepath = self.module_dir / filename
-        if not filepath.exists():
-            return None
+    def read_yaml_file(self, filename):
+        """
+        Read and parse a YAML file from module directory without logging
+        
+        Safe to call from worker threads.
         
+        Returns:
+            (data, error message or None); data is None if the file is missing
+        """
+        filepath = self.module_dir / filename
         try:
+            # Hand libyaml the file object (not its text) so error
+            # marks keep the file path
             with open(filepath, 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f)
+                return yaml.load(f, Loader=_YamlLoader), None
+        except FileNotFoundError:
+            return None, None
         except yaml.YAMLError as e:
-            self.log_error(f"YAML syntax error in {filename}: {e}")
-            return None
+            return None, f"YAML syntax error in {filename}: {e}"
         except Exception as e:
-            self.log_error(f"Failed to load {filename}: {e}")
-            return None
+            return None, f"Failed to load {filename}: {e}"
+    
+    def load_yaml_file(self, filename):
+        """Load a YAML file from module directory"""
+        data, error = self.read_yaml_file(filename)
+        if error:
+            self.log_error(error)
+        return data
     
     def load_module_config(self):
         """Load module.yaml (required)"""
@@ -83,55 +118,25 @@ class ModuleLoader:
         print(f"  [OK] module.yaml: {config['display_name']}")
         return True
     
-    def load_stories(self):
-        """Load stories.yaml (optional)"""
-        data = self.load_yaml_file('stories.yaml')
-        if data and 'stories' in data:
-            self.stories = data['stories']
-            print(f"  [OK] stories.yaml: {len(self.stories)} entries")
-            return True
-        return False
+    def load_optional(self, filename, key, label):
+        """Load one of the OPTIONAL_FILES (e.g. stories.yaml)"""
+        return self._apply_optional(self.load_yaml_file(filename), filename, key, label)
     
-    def load_encounters(self):
-        """Load encounters.yaml (optional)"""
-        data = self.load_yaml_file('encounters.yaml')
-        if data and 'encounters' in data:
-            self.encounters = data['encounters']
-            print(f"  [OK] encounters.yaml: {len(self.encounters)} encounters")
-            return True
-        return False
-    
-    def load_npcs(self):
-        """Load npcs.yaml (optional)"""
-        data = self.load_yaml_file('npcs.yaml')
-        if data and 'npcs' in data:
-            self.npcs = data['npcs']
-            print(f"  [OK] npcs.yaml: {len(self.npcs)} custom NPCs")
-            return True
-        return False
-    
-    def load_items(self):
-        """Load items.yaml (optional)"""
-        data = self.load_yaml_file('items.yaml')
-        if data and 'items' in data:
-            self.items = data['items']
-            print(f"  [OK] items.yaml: {len(self.items)} items")
-            return True
-        return False
-    
-    def load_parcels(self):
-        """Load parcels.yaml (optional)"""
-        data = self.load_yaml_file('parcels.yaml')
-        if data and 'parcels' in data:
-            self.parcels = data['parcels']
-            print(f"  [OK] parcels.yaml: {len(self.parcels)} parcels")
+    def _apply_optional(self, data, filename, key, label):
+        """Store data[key] as self.<key> (key is both the YAML root key and the attribute name)"""
+        if data and key in data:
+            setattr(self, key, data[key])
+            print(f"  [OK] {filename}: {len(data[key])} {label}")
             return True
         return False
     
     def load_images(self):
         """Load images from images.yaml or auto-detect from images/ folder"""
+        return self._apply_images(self.load_yaml_file('images.yaml'))
+    
+    def _apply_images(self, data):
+        """Set self.images from parsed images.yaml data, else auto-detect images/ files"""
         # First try loading from images.yaml
-        data = self.load_yaml_file('images.yaml')
         if data and 'images' in data:
             self.images = data['images']
             print(f"  [OK] images.yaml: {len(self.images)} images")
@@ -263,13 +268,20 @@ class ModuleLoader:
         if not self.load_module_config():
             return False
         
-        # All others are optional
-        self.load_stories()
-        self.load_encounters()
-        self.load_npcs()
-        self.load_items()
-        self.load_parcels()
-        self.load_images()
+        # All others are optional. The files are independent, so read and
+        # parse them concurrently, then apply the results here in the usual
+        # order so errors and output stay deterministic
+        with ThreadPoolExecutor(max_workers=len(self.OPTIONAL_FILES) + 1) as pool:
+            results = list(pool.map(self.read_yaml_file, [spec[0] for spec in self.OPTIONAL_FILES]))
+            images = pool.submit(self.read_yaml_file, 'images.yaml')
+        for spec, (data, error) in zip(self.OPTIONAL_FILES, results):
+            if error:
+                self.log_error(error)
+            self._apply_optional(data, *spec)
+        data, error = images.result()
+        if error:
+            self.log_error(error)
+        self._apply_images(data)
         self.load_tokens()
         
         # Check if at least some content exists
@@ -10,10 +10,18 @@ SOURCE PRIORITY HIERARCHY (when multiple sources have the same name):
 4. Creatures & Treasures (lowest priority)
 """
 
-import json
-import copy
+import functools
+import sys
+from operator import itemgetter
 from typing import Dict, List, Optional
 
+try:
+    from .jsondata import freeze_json, thaw_json, load_json, load_index_cache, store_index_cache
+except ImportError:
+    from jsondata import freeze_json, thaw_json, load_json, load_index_cache, store_index_cache
+
+DEFAULT_JSON_PATH = '/mnt/user-data/outputs/npcs_and_creatures_complete.json'
+
 
 class CompleteNPCCreatureLibrary:
     """Library for accessing complete NPCs and creatures from MERP/ICE rulebooks"""
@@ -26,25 +34,52 @@ class CompleteNPCCreatureLibrary:
         'Creatures & Treasures': 4
     }
     
-    def __init__(self, json_path: str = '/mnt/user-data/outputs/npcs_and_creatures_complete.json'):
+    # Text fields ({'_text': ...}) with few distinct values, interned at
+    # index time along with _source_module
+    INTERNED_TEXT_FIELDS = ('profession', 'group')
+    
+    # Field type mappings for proper FG XML conversion of modifications
+    NUMBER_FIELDS = frozenset({'hp', 'at', 'db', 'level', 'baserate', 'reach', 'outlook', 'mnbonus', 'hits'})
+    STRING_FIELDS = frozenset({'profession', 'race', 'group', 'subgroup', 'spells', 'stats', 'size'})
+    
+    def __init__(self, json_path: str = DEFAULT_JSON_PATH):
         """Load the complete NPC and creature data"""
-        with open(json_path, 'r') as f:
-            self.data = json.load(f)
+        # Serialized copy_for_modification templates, per (name, source)
+        self._frozen_base = functools.lru_cache(maxsize=256)(self._freeze_base)
         
-        # Build quick lookup indexes with priority
+        # Warm start: data and indexes pickled together by a previous run
+        cached = load_index_cache(json_path, __file__)
+        if cached is not None:
+            self.data, indexes = cached
+            self.__dict__.update(indexes)
+            return
+        
+        self.data = load_json(json_path)
+        
+        # Build quick lookup indexes with priority, caching everything
+        # _build_indexes sets (pickled in one go so entries stay shared)
+        unindexed = set(vars(self))
         self._build_indexes()
+        indexes = {attr: value for attr, value in vars(self).items() if attr not in unindexed}
+        store_index_cache(json_path, __file__, (self.data, indexes))
     
     def _get_priority(self, source: str) -> int:
-        """Get priority value for a source (lower is better)"""
+        """
+        Get priority value for a source (lower is better)
+        
+        Indexed entries carry this precomputed as entry['_priority']
+        """
         return self.SOURCE_PRIORITY.get(source, 999)
     
     def _build_indexes(self):
         """Build indexes for fast lookups with source priority"""
         self.by_name = {}  # Will store highest priority version only
-        self.by_name_all = {}  # Will store all versions
+        self.by_name_all = {}  # Will store all versions, sorted by priority
+        self.by_name_source = {}  # name -> source -> first version from that source
         self.by_id = {}
         self.by_profession = {}
         self.by_level = {}
+        self.by_prof_level = {}  # (profession, level) -> first matching NPC
         
         # Collect all entries with their sources
         all_entries = []
@@ -62,49 +97,90 @@ class CompleteNPCCreatureLibrary:
             all_entries.append(creature)
         
         # Now index everything, applying priority rules
+        intern = sys.intern
         for entry in all_entries:
-            name = entry.get('_display_name', '').lower()
+            # Intern low-cardinality strings so entries share one object
+            # per value and equality checks can short-circuit on identity
+            source = entry.get('_source_module')
+            if source.__class__ is str:
+                entry['_source_module'] = intern(source)
+            for field in self.INTERNED_TEXT_FIELDS:
+                value = entry.get(field)
+                if isinstance(value, dict):
+                    text = value.get('_text')
+                    if text.__class__ is str:
+                        value['_text'] = intern(text)
+            
+            name = intern(entry.get('_display_name', '').lower())
             source = entry.get('_source_module', '')
             entry_id = entry.get('_id', '')
             
+            # Stamp source priority once for comparisons and sorting
+            priority = self.SOURCE_PRIORITY.get(source, 999)
+            entry['_priority'] = priority
+            
+            # Stamp lowercased group text for by_group
+            # (None if missing or not a text field)
+            group_val = entry.get('group')
+            entry['_group_lc'] = intern(group_val.get('_text', '').lower()) if isinstance(group_val, dict) else None
+            
             # Always index by ID (unique)
             if entry_id:
                 self.by_id[entry_id] = entry
             
-            # Index by name with priority
+            # Index by name (all versions, and per source)
             if name:
-                # Store all versions
-                if name not in self.by_name_all:
-                    self.by_name_all[name] = []
-                self.by_name_all[name].append(entry)
-                
-                # Store only highest priority version in main index
-                if name not in self.by_name:
-                    self.by_name[name] = entry
-                else:
-                    # Check priority - replace if new entry has higher priority
-                    existing_source = self.by_name[name].get('_source_module', '')
-                    if self._get_priority(source) < self._get_priority(existing_source):
-                        self.by_name[name] = entry
+                self.by_name_all.setdefault(name, []).append(entry)
+                self.by_name_source.setdefault(name, {}).setdefault(source, entry)
             
-            # Index by profession (Character Law NPCs only)
+            # Numeric level, if the entry has one
+            level = None
+            if 'level' in entry and isinstance(entry['level'], dict):
+                level_text = entry['level'].get('_text', '0')
+                try:
+                    level = int(level_text)
+                except ValueError:
+                    pass
+            
+            # Index by profession (Character Law NPCs only), and by
+            # (profession, level) keeping the first entry in load order
             if 'profession' in entry and isinstance(entry['profession'], dict):
                 prof = entry['profession'].get('_text', '')
                 if prof:
                     if prof not in self.by_profession:
                         self.by_profession[prof] = []
                     self.by_profession[prof].append(entry)
+                    if level is not None:
+                        self.by_prof_level.setdefault((prof, level), entry)
             
             # Index by level
-            if 'level' in entry and isinstance(entry['level'], dict):
-                level_text = entry['level'].get('_text', '0')
-                try:
-                    level = int(level_text)
-                    if level not in self.by_level:
-                        self.by_level[level] = []
-                    self.by_level[level].append(entry)
-                except ValueError:
-                    pass
+            if level is not None:
+                if level not in self.by_level:
+                    self.by_level[level] = []
+                self.by_level[level].append(entry)
+        
+        # Presort each name's versions by priority (stable, so ties keep
+        # load order); the head is the default version
+        priority_key = itemgetter('_priority')
+        for name, bucket in self.by_name_all.items():
+            if len(bucket) > 1:
+                bucket.sort(key=priority_key)
+            self.by_name[name] = bucket[0]
+        
+        # Group -> default version of each name in that group, in by_name order
+        self.by_group = {}
+        for entry in self.by_name.values():
+            group_lc = entry['_group_lc']
+            if group_lc is not None:
+                self.by_group.setdefault(group_lc, []).append(entry)
+        
+        # Trigram -> names containing it, for substring search
+        self._trigrams: Dict[str, set] = {}
+        for name in self.by_name:
+            for i in range(len(name) - 2):
+                self._trigrams.setdefault(name[i:i + 3], set()).add(name)
+        # Name -> position in by_name, so searches keep index order
+        self._name_order = {name: i for i, name in enumerate(self.by_name)}
     
     def find_by_name(self, name: str, preferred_source: str = None) -> Optional[Dict]:
         """
@@ -123,10 +199,9 @@ class CompleteNPCCreatureLibrary:
         
         if preferred_source:
             # User specified a preferred source
-            all_versions = self.by_name_all.get(name_lower, [])
-            for entry in all_versions:
-                if entry.get('_source_module') == preferred_source:
-                    return entry
+            entry = self.by_name_source.get(name_lower, {}).get(preferred_source)
+            if entry is not None:
+                return entry
             # If preferred not found, fall through to default priority
         
         # Return highest priority version
@@ -139,11 +214,7 @@ class CompleteNPCCreatureLibrary:
         Returns:
             List of entries, sorted by source priority
         """
-        name_lower = name.lower()
-        entries = self.by_name_all.get(name_lower, [])
-        
-        # Sort by priority
-        return sorted(entries, key=lambda e: self._get_priority(e.get('_source_module', '')))
+        return list(self.by_name_all.get(name.lower(), []))
     
     def get_source_info(self, name: str) -> Dict:
         """
@@ -158,20 +229,16 @@ class CompleteNPCCreatureLibrary:
         if not all_versions:
             return {'found': False, 'sources': []}
         
-        sources = []
-        for entry in all_versions:
-            source = entry.get('_source_module', 'Unknown')
-            ref_path = entry.get('_reference_path', '')
-            priority = self._get_priority(source)
-            sources.append({
-                'source': source,
-                'reference_path': ref_path,
-                'priority': priority,
-                'is_default': (entry == self.by_name.get(name_lower))
-            })
-        
-        # Sort by priority
-        sources.sort(key=lambda s: s['priority'])
+        # Versions are presorted by priority; the first is the default
+        sources = [
+            {
+                'source': entry.get('_source_module', 'Unknown'),
+                'reference_path': entry.get('_reference_path', ''),
+                'priority': entry['_priority'],
+                'is_default': idx == 0
+            }
+            for idx, entry in enumerate(all_versions)
+        ]
         
         return {
             'found': True,
@@ -188,30 +255,27 @@ class CompleteNPCCreatureLibrary:
         Returns highest priority version for each name
         """
         search_term = search_term.lower()
-        results = []
         
-        for name, entry in self.by_name.items():
-            if search_term in name:
-                results.append(entry)
-        
-        return results
+        if len(search_term) < 3:
+            # Too short for trigrams - scan every name
+            return [entry for name, entry in self.by_name.items() if search_term in name]
+        
+        # Only names sharing every trigram of the term can contain it
+        candidates = None
+        for i in range(len(search_term) - 2):
+            names = self._trigrams.get(search_term[i:i + 3])
+            if not names:
+                return []
+            candidates = set(names) if candidates is None else candidates & names
+            if not candidates:
+                return []
+        
+        matches = sorted((name for name in candidates if search_term in name), key=self._name_order.get)
+        return [self.by_name[name] for name in matches]
     
     def find_by_profession_and_level(self, profession: str, level: int) -> Optional[Dict]:
         """Find an NPC by profession and level (Character Law only)"""
-        if profession not in self.by_profession:
-            return None
-        
-        for npc in self.by_profession[profession]:
-            if 'level' in npc and isinstance(npc['level'], dict):
-                npc_level_text = npc['level'].get('_text', '0')
-                try:
-                    npc_level = int(npc_level_text)
-                    if npc_level == level:
-                        return npc
-                except ValueError:
-                    pass
-        
-        return None
+        return self.by_prof_level.get((profession, level))
     
     def get_reference_path(self, name: str, preferred_source: str = None) -> Optional[str]:
         """Get the Fantasy Grounds reference path for an NPC/creature"""
@@ -220,6 +284,19 @@ class CompleteNPCCreatureLibrary:
             return entry.get('_reference_path')
         return None
     
+    def _freeze_base(self, name_lower: str, preferred_source: Optional[str]):
+        """
+        (library entry, freeze_json of it) for copy_for_modification, or None
+        
+        Memoized, so the entry is snapshotted on first use. That is only
+        equivalent to copying the entry on every call because library
+        entries are never edited in place (see get_library).
+        """
+        base_entry = self.find_by_name(name_lower, preferred_source)
+        if not base_entry:
+            return None
+        return base_entry, freeze_json(base_entry)
+    
     def copy_for_modification(self, name: str, new_name: str, modifications: Dict = None,
                              preferred_source: str = None) -> Optional[Dict]:
         """
@@ -233,13 +310,15 @@ class CompleteNPCCreatureLibrary:
             
         Returns:
             Complete NPC/creature data with modifications applied
+            (built from a memoized snapshot of the library entry)
         """
-        base_entry = self.find_by_name(name, preferred_source)
-        if not base_entry:
+        frozen = self._frozen_base(name.lower(), preferred_source)
+        if frozen is None:
             return None
+        base_entry, frozen_entry = frozen
         
         # Deep copy to avoid modifying original
-        new_entry = copy.deepcopy(base_entry)
+        new_entry = thaw_json(frozen_entry)
         
         # Update the name
         if 'name' in new_entry and isinstance(new_entry['name'], dict):
@@ -258,11 +337,9 @@ class CompleteNPCCreatureLibrary:
         
         # Apply modifications
         if modifications:
-            # Field type mappings for proper FG XML conversion
-            number_fields = {'hp', 'at', 'db', 'level', 'baserate', 'reach', 'outlook', 'mnbonus', 'hits'}
-            string_fields = {'profession', 'race', 'group', 'subgroup', 'spells', 'stats', 'size'}
-            formattedtext_fields = {'description', 'abilities', 'notes'}           
- 
+            number_fields = self.NUMBER_FIELDS
+            string_fields = self.STRING_FIELDS
+            
             for key, value in modifications.items():
                 # If the field already exists in the NPC, preserve its structure
                 if key in new_entry and isinstance(new_entry[key], dict):
@@ -317,20 +394,8 @@ class CompleteNPCCreatureLibrary:
     
     def search_creatures_by_group(self, group: str) -> List[Dict]:
         """Search for creatures by group (e.g., "Animals", "Monsters")"""
-        results = []
-        seen_names = set()
-        
-        # Collect all matches, but only keep highest priority version of each name
-        for entry in self.by_name.values():
-            if 'group' in entry and isinstance(entry['group'], dict):
-                creature_group = entry['group'].get('_text', '').lower()
-                if creature_group == group.lower():
-                    name = entry.get('_display_name', '').lower()
-                    if name not in seen_names:
-                        results.append(entry)
-                        seen_names.add(name)
-        
-        return results
+        # Only the highest priority version of each name is indexed
+        return list(self.by_group.get(group.lower(), ()))
     
     def get_simple_stats(self, name: str, preferred_source: str = None) -> Optional[Dict]:
         """Get simplified stats for quick reference"""
@@ -361,9 +426,23 @@ class CompleteNPCCreatureLibrary:
         return stats
 
 
+@functools.lru_cache(maxsize=None)
+def get_library(json_path: str = DEFAULT_JSON_PATH) -> CompleteNPCCreatureLibrary:
+    """
+    Shared library instance for a JSON file, built on first use
+    
+    Every ReferenceLibrary in the process gets the same instance, so
+    callers must treat it as read-only: derive new entries with
+    copy_for_modification, and clone entries before editing them (as
+    NPCGenerator.create_npc_from_library does). debug_tools/
+    check_jobs_output.py checks that a build leaves the data unchanged.
+    """
+    return CompleteNPCCreatureLibrary(json_path)
+
+
 # Example usage
 if __name__ == "__main__":
-    lib = CompleteNPCCreatureLibrary()
+    lib = get_library()
     
     print("=" * 70)
     print("COMPLETE NPC/CREATURE LIBRARY TEST WITH SOURCE PRIORITY")
@@ -2,19 +2,119 @@
 Module Packager - Create .mod file from XML and resources
 """
 
-import os
-import shutil
+import functools
+import io
+import multiprocessing
 import zipfile
-import tempfile
-import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from .xmltree import ET
 from xml.dom import minidom
 from pathlib import Path
 
+
+def _escape(data):
+    """Escape attribute data the way minidom writes it"""
+    return data.replace("&", "&amp;").replace("<", "&lt;").replace("\"", "&quot;").replace(">", "&gt;")
+
+
+def _escape_text(data):
+    """Escape text data the way minidom writes it"""
+    if '\r' in data:
+        # The XML parser normalizes line ends; match its reading of the text
+        data = data.replace('\r\n', '\n').replace('\r', '\n')
+    return _escape(data)
+
+
+def _write_pretty(elem, indent, write):
+    """
+    Write elem like minidom's Element.writexml(indent, "\t", "\n")
+    
+    Text and tails are minidom text nodes: an element whose only child is
+    text stays on one line, otherwise every child node gets its own
+    indented line.
+    """
+    tag = elem.tag
+    if not isinstance(tag, str):
+        # Comment / processing instruction - not produced by the generators
+        raise TypeError(f"unsupported XML node: {elem!r}")
+    write(f"{indent}<{tag}")
+    for name, value in elem.attrib.items():
+        write(f' {name}="{_escape(value)}"')
+    
+    text = elem.text
+    children = list(elem)
+    if not children:
+        if text:
+            write(f">{_escape_text(text)}</{tag}>\n")
+        else:
+            write("/>\n")
+        return
+    
+    write(">\n")
+    child_indent = indent + "\t"
+    if text:
+        write(_escape_text(f"{child_indent}{text}\n"))
+    for child in children:
+        _write_pretty(child, child_indent, write)
+        if child.tail:
+            write(_escape_text(f"{child_indent}{child.tail}\n"))
+    write(f"{indent}</{tag}>\n")
+
+
+# Pixel size of auto-generated letter tokens
+TOKEN_SIZE = 100
+
+
+@functools.lru_cache(maxsize=None)
+def _token_base(size):
+    """
+    Font and blank disc image shared by every letter token of this size
+    
+    Cached per process, so pool workers each build them once as well.
+    """
+    from PIL import Image, ImageDraw, ImageFont
+
+    pad = 4
+    try:
+        font = ImageFont.truetype("DejaVuSans-Bold.ttf", 56)
+    except Exception:
+        font = ImageFont.load_default()
+
+    base = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    ImageDraw.Draw(base).ellipse((pad, pad, size - pad, size - pad), fill=(60, 60, 60, 255))
+    return font, base
+
+
+def _render_token(args):
+    """Render one letter token, returning the PNG bytes (args: (letter, size))"""
+    from PIL import ImageDraw
+
+    letter, size = args
+    font, base = _token_base(size)
+    img = base.copy()
+    draw = ImageDraw.Draw(img)
+
+    text = (letter or "?")[:1].upper()
+    bbox = draw.textbbox((0, 0), text, font=font)
+    tw = bbox[2] - bbox[0]
+    th = bbox[3] - bbox[1]
+    draw.text(((size - tw) / 2, (size - th) / 2 - 2), text, font=font, fill=(255, 255, 255, 255))
+
+    # Tokens are tiny; fast deflate costs a few bytes each
+    buf = io.BytesIO()
+    img.save(buf, "PNG", optimize=False, compress_level=1)
+    return buf.getvalue()
+
+
 class ModulePackager:
-    def __init__(self, loader, verbose=False):
+    # Already-compressed formats are stored as-is: deflating them costs CPU
+    # for next to no size reduction
+    STORED_SUFFIXES = frozenset({'.png', '.jpg', '.jpeg', '.webp', '.gif'})
+    
+    def __init__(self, loader, verbose=False, jobs=1):
         self.loader = loader
         self.verbose = verbose
-        self.temp_dir = None
+        self.jobs = jobs  # Worker processes for token rendering (1 = serial)
     
     def create_definition_xml(self):
         """Create definition.xml with module metadata"""
@@ -47,27 +147,57 @@ class ModulePackager:
         return root
     
     def xml_to_string(self, root):
-        """Convert XML element to formatted string"""
-        rough_string = ET.tostring(root, encoding='utf-8')
-        reparsed = minidom.parseString(rough_string)
-        return reparsed.toprettyxml(indent="\t", encoding='utf-8').decode('utf-8')
+        """
+        Convert XML element to formatted string
+        
+        Produces exactly what serializing, re-parsing with minidom and
+        toprettyxml(indent="\t") gives, in one direct pass over the tree.
+        """
+        parts = ['<?xml version="1.0" encoding="utf-8"?>\n']
+        try:
+            _write_pretty(root, "", parts.append)
+        except TypeError:
+            rough_string = ET.tostring(root, encoding='utf-8')
+            reparsed = minidom.parseString(rough_string)
+            return reparsed.toprettyxml(indent="\t", encoding='utf-8').decode('utf-8')
+        return "".join(parts)
     
-    def create_temp_directory(self):
-        """Create temporary directory for module assembly"""
-        self.temp_dir = Path(tempfile.mkdtemp(prefix='fg_module_'))
-        if self.verbose:
-            print(f"  Created temp directory: {self.temp_dir}")
-        return self.temp_dir
+    def add_file(self, zf, source_file, arcname):
+        """Add a source file to the archive (keeps its modification time)"""
+        if source_file.suffix.lower() in self.STORED_SUFFIXES:
+            zf.write(source_file, arcname, compress_type=zipfile.ZIP_STORED)
+        else:
+            zf.write(source_file, arcname)
     
-    def copy_images(self):
-        """Copy images directory and thumbnail.png to temp directory"""
+    def add_tree_files(self, zf, source_dir, arc_prefix, skip=()):
+        """
+        Add every file under source_dir to the archive below arc_prefix,
+        preserving structure
+        
+        Args:
+            skip: Archive names to leave out (written by another step)
+        
+        Returns:
+            Number of files added
+        """
+        added = 0
+        for source_file in source_dir.rglob('*'):
+            if source_file.is_file():
+                arcname = f"{arc_prefix}/{source_file.relative_to(source_dir).as_posix()}"
+                if arcname in skip:
+                    continue
+                self.add_file(zf, source_file, arcname)
+                added += 1
+        return added
+    
+    def copy_images(self, zf):
+        """Add images directory and thumbnail.png to the archive"""
         something_copied = False
         
         # Copy thumbnail.png if it exists (goes in root of module)
         source_thumbnail = self.loader.module_dir / 'thumbnail.png'
         if source_thumbnail.exists():
-            dest_thumbnail = self.temp_dir / 'thumbnail.png'
-            shutil.copy2(source_thumbnail, dest_thumbnail)
+            self.add_file(zf, source_thumbnail, 'thumbnail.png')
             something_copied = True
             if self.verbose:
                 print("  [OK] Copied thumbnail.png")
@@ -75,22 +205,8 @@ class ModulePackager:
         # Copy ALL files from images/ directory (FG auto-imports them)
         source_images = self.loader.module_dir / 'images'
         if source_images.exists() and source_images.is_dir():
-            dest_images = self.temp_dir / 'images'
-            dest_images.mkdir(exist_ok=True)
-            
             # Copy all image files
-            copied = 0
-            for source_file in source_images.rglob('*'):
-                if source_file.is_file():
-                    # Preserve directory structure
-                    rel_path = source_file.relative_to(source_images)
-                    dest_file = dest_images / rel_path
-                    
-                    # Create subdirectories if needed
-                    dest_file.parent.mkdir(parents=True, exist_ok=True)
-                    
-                    shutil.copy2(source_file, dest_file)
-                    copied += 1
+            copied = self.add_tree_files(zf, source_images, 'images')
             
             if copied > 0:
                 something_copied = True
@@ -102,8 +218,8 @@ class ModulePackager:
         
         return something_copied
     
-    def copy_tokens(self):
-        """Copy tokens directory to temp directory"""
+    def copy_tokens(self, zf):
+        """Add tokens directory to the archive"""
         source_tokens = self.loader.module_dir / 'tokens'
         
         if not source_tokens.exists() or not source_tokens.is_dir():
@@ -111,22 +227,9 @@ class ModulePackager:
                 print("  [SKIP] No tokens to copy")
             return False
         
-        dest_tokens = self.temp_dir / 'tokens'
-        dest_tokens.mkdir(exist_ok=True)
-        
-        # Copy all token files
-        copied = 0
-        for source_file in source_tokens.rglob('*'):
-            if source_file.is_file():
-                # Preserve directory structure
-                rel_path = source_file.relative_to(source_tokens)
-                dest_file = dest_tokens / rel_path
-                
-                # Create subdirectories if needed
-                dest_file.parent.mkdir(parents=True, exist_ok=True)
-                
-                shutil.copy2(source_file, dest_file)
-                copied += 1
+        # Copy all token files; generated tokens replace same-named files
+        generated = getattr(self.loader, "generated_tokens", None) or {}
+        copied = self.add_tree_files(zf, source_tokens, 'tokens', skip=generated)
         
         if copied > 0:
             if self.verbose:
@@ -137,9 +240,9 @@ class ModulePackager:
             print("  [SKIP] No tokens to copy")
         return False
 
-    def write_generated_tokens(self):
+    def write_generated_tokens(self, zf):
         """
-        Write auto-generated letter token PNGs into tokens/ inside the temp module folder.
+        Write auto-generated letter token PNGs into tokens/ in the archive.
         NPCGenerator records what it needs in loader.generated_tokens[token_path] = initial
         """
         gen = getattr(self.loader, "generated_tokens", None)
@@ -149,73 +252,44 @@ class ModulePackager:
             return False
 
         try:
-            from PIL import Image, ImageDraw, ImageFont
+            import PIL.ImageDraw  # noqa: F401 - rendering happens in _render_token
         except ImportError as e:
             raise RuntimeError(
                 "Auto token generation requires Pillow. Install it with: pip install pillow"
             ) from e
 
-        wrote = 0
-        for token_path, letter in gen.items():
-            out_path = self.temp_dir / token_path  # e.g. tokens/id-00001.png
-            out_path.parent.mkdir(parents=True, exist_ok=True)
-
-            size = 100
-            img = Image.new("RGBA", (size, size), (0, 0, 0, 0))
-            draw = ImageDraw.Draw(img)
-
-            pad = 4
-            draw.ellipse((pad, pad, size - pad, size - pad), fill=(60, 60, 60, 255))
-
-            text = (letter or "?")[:1].upper()
-            try:
-                font = ImageFont.truetype("DejaVuSans-Bold.ttf", 56)
-            except Exception:
-                font = ImageFont.load_default()
-
-            bbox = draw.textbbox((0, 0), text, font=font)
-            tw = bbox[2] - bbox[0]
-            th = bbox[3] - bbox[1]
-            draw.text(((size - tw) / 2, (size - th) / 2 - 2), text, font=font, fill=(255, 255, 255, 255))
+        use_pool = (
+            self.jobs > 1 and len(gen) > 1
+            and 'fork' in multiprocessing.get_all_start_methods()
+        )
+        tasks = [(letter, TOKEN_SIZE) for letter in gen.values()]
+        if use_pool:
+            if self.verbose:
+                print(f"  Rendering tokens with {self.jobs} worker processes")
+            ctx = multiprocessing.get_context('fork')
+            with ProcessPoolExecutor(max_workers=self.jobs, mp_context=ctx) as pool:
+                png_data = list(pool.map(_render_token, tasks, chunksize=16))
+        else:
+            png_data = map(_render_token, tasks)
 
-            img.save(out_path, "PNG")
+        wrote = 0
+        for token_path, png in zip(gen, png_data):
+            zf.writestr(token_path, png, compress_type=zipfile.ZIP_STORED)  # e.g. tokens/id-00001.png
             wrote += 1
 
         if self.verbose:
             print(f"  [OK] Wrote {wrote} generated token files")
         return wrote > 0
-
-    def create_zip(self, output_path):
-        """Create .mod file (zip archive) from temp directory"""
-        
-        if self.verbose:
-            print(f"  Creating .mod archive...")
-        
-        # Create zip file
-        with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zf:
-            # Add all files from temp directory
-            for root, dirs, files in os.walk(self.temp_dir):
-                for file in files:
-                    file_path = Path(root) / file
-                    arcname = file_path.relative_to(self.temp_dir).as_posix()
-                    zf.write(file_path, arcname)
-        
-        if self.verbose:
-            print(f"  [OK] Created .mod archive")
-        
-        return True
-    
-    def cleanup(self):
-        """Remove temporary directory"""
-        if self.temp_dir and self.temp_dir.exists():
-            shutil.rmtree(self.temp_dir)
-            if self.verbose:
-                print(f"  Cleaned up temp directory")
     
     def package(self, db_xml, output_dir=None, output_filename=None):
         """
         Package module as .mod file
         
+        Everything is written straight into the archive; nothing is staged
+        on disk. The archive is built under a .part name and only renamed
+        to the output path once complete, so a failure leaves any
+        previous .mod untouched.
+        
         Args:
             db_xml: ET.Element - The complete db.xml root element
             output_dir: Path to output directory (default: ./output)
@@ -225,74 +299,63 @@ class ModulePackager:
             Path to created .mod file
         """
         
+        # Determine output path
+        if output_dir is None:
+            output_dir = Path.cwd() / 'output'
+        else:
+            output_dir = Path(output_dir)
+        
+        output_dir.mkdir(parents=True, exist_ok=True)
+        
+        if output_filename is None:
+            output_filename = f"{self.loader.config['name']}.mod"
+        
+        output_path = output_dir / output_filename
+        partial_path = output_path.with_name(output_path.name + '.part')
+        
+        if self.verbose:
+            print(f"\nPackaging module: {self.loader.config['display_name']}")
+            print(f"Output: {output_path}")
+            print()
+            print(f"  Creating .mod archive...")
+        
         try:
-            # Determine output path
-            if output_dir is None:
-                output_dir = Path.cwd() / 'output'
-            else:
-                output_dir = Path(output_dir)
-            
-            output_dir.mkdir(parents=True, exist_ok=True)
-            
-            if output_filename is None:
-                output_filename = f"{self.loader.config['name']}.mod"
-            
-            output_path = output_dir / output_filename
-            
-            if self.verbose:
-                print(f"\nPackaging module: {self.loader.config['display_name']}")
-                print(f"Output: {output_path}")
-                print()
-            
-            # Create temp directory
-            self.create_temp_directory()
-            
-            # Create definition.xml
-            if self.verbose:
-                print("  Creating definition.xml...")
-            
-            definition_root = self.create_definition_xml()
-            definition_xml = self.xml_to_string(definition_root)
-            
-            definition_path = self.temp_dir / 'definition.xml'
-            with open(definition_path, 'w', encoding='utf-8') as f:
-                f.write(definition_xml)
-            
-            if self.verbose:
-                print("  [OK] Created definition.xml")
-            
-            # Write db.xml
-            if self.verbose:
-                print("  Creating db.xml...")
-            
-            db_xml_string = self.xml_to_string(db_xml)
-            
-            db_path = self.temp_dir / 'db.xml'
-            with open(db_path, 'w', encoding='utf-8') as f:
-                f.write(db_xml_string)
-            
-            if self.verbose:
-                print("  [OK] Created db.xml")
-            
-            # Copy images
-            self.copy_images()
-            
-            # Copy tokens
-            self.copy_tokens()
-           
-            # Write tokens
-            self.write_generated_tokens()
- 
-            # Create .mod file (zip)
-            self.create_zip(output_path)
-            
-            # Cleanup
-            self.cleanup()
+            with zipfile.ZipFile(partial_path, 'w', zipfile.ZIP_DEFLATED) as zf:
+                # Create definition.xml
+                if self.verbose:
+                    print("  Creating definition.xml...")
+                
+                definition_root = self.create_definition_xml()
+                zf.writestr('definition.xml', self.xml_to_string(definition_root))
+                
+                if self.verbose:
+                    print("  [OK] Created definition.xml")
+                
+                # Write db.xml
+                if self.verbose:
+                    print("  Creating db.xml...")
+                
+                zf.writestr('db.xml', self.xml_to_string(db_xml))
+                
+                if self.verbose:
+                    print("  [OK] Created db.xml")
+                
+                # Copy images
+                self.copy_images(zf)
+                
+                # Copy tokens
+                self.copy_tokens(zf)
+               
+                # Write tokens
+                self.write_generated_tokens(zf)
             
-            return output_path
+            partial_path.replace(output_path)
+        except BaseException:
+            # Drop the incomplete archive
+            partial_path.unlink(missing_ok=True)
+            raise
+        
+        if self.verbose:
+            print(f"  [OK] Created .mod archive")
         
-        except Exception as e:
-            # Cleanup on error
-            if self.temp_dir:
-                self.cleanup()
-            raise e
+        return output_path
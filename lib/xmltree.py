@@ -0,0 +1,16 @@
+"""
+ElementTree backend shared by the XML generators
+Uses lxml's C-backed etree when installed, otherwise the standard library
+ElementTree (which uses its C accelerator automatically)
+
+All generators must build from the same backend: db.xml is assembled by
+appending every generated section into one tree, and lxml and stdlib
+elements cannot be mixed.
+"""
+
+try:
+    from lxml import etree as ET
+    HAS_LXML = True
+except ImportError:
+    import xml.etree.ElementTree as ET
+    HAS_LXML = False